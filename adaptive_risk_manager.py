@@ -1,23 +1,23 @@
 class AdaptiveRiskManager:
     """مدير مخاطر تلقائي يتكيف مع ظروف السوق"""
     
+    # تعديل المخاطرة بناء على جودة الإشارة
+    QUALITY_ADJUSTMENT = {
+        'HIGH': 1.5,
+        'MEDIUM': 1.0,
+        'LOW': 0.5
+    }
+    
     def __init__(self, config, initial_capital=10000):
         self.config = config
         self.capital = initial_capital
         self.daily_trades = 0
         self.market_volatility = 'NORMAL'
     
-    def calculate_dynamic_position_size(self, signal_quality, entry_price, sl_price):
+    def calculate_dynamic_position_size(self, signal_quality, entry_price, sl_price, win_probability=None):
         """حجم مركز ديناميكي"""
         base_risk = self.config.BASE_RISK
         
-        # تعديل المخاطرة بناء على جودة الإشارة
-        quality_adjustment = {
-            'HIGH': 1.5,
-            'MEDIUM': 1.0,
-            'LOW': 0.5
-        }
-        
         # تعديل بناء على تقلبات السوق
         volatility_adjustment = {
             'HIGH': 0.7,
@@ -25,7 +25,13 @@ class AdaptiveRiskManager:
             'LOW': 1.2
         }
         
-        adjusted_risk = base_risk * quality_adjustment.get(signal_quality, 1.0)
+        adjusted_risk = base_risk * self.QUALITY_ADJUSTMENT.get(signal_quality, 1.0)
+        
+        # احتمال النموذج المتعلم (إن وجد) يحل محل تعديل الجودة الثابت
+        if win_probability is not None:
+            probability_adjustment = win_probability / self.config.QUALITY_MODEL_BASELINE_PROBABILITY
+            adjusted_risk = base_risk * min(max(probability_adjustment, 0.5), 1.5)
+        
         adjusted_risk *= volatility_adjustment.get(self.market_volatility, 1.0)
         
         risk_amount = self.capital * adjusted_risk
@@ -0,0 +1,338 @@
+import argparse
+import sys
+import time
+
+# الوحدات الثقيلة (pandas / yfinance / TA-Lib / requests) تُستورد داخل
+# كل أمر فرعي عند الحاجة فقط، لتبقى أوامر التقارير القصيرة سريعة الإقلاع
+
+
+def _build_strategy(args, live_trading):
+    """بناء الاستراتيجية واستعادة حالتها الدافئة"""
+    from hybrid_config import HybridConfig
+    from main import HybridConfluenceScalper
+    from warm_state import WarmStateCache
+
+    started = time.perf_counter()
+    strategy = HybridConfluenceScalper(live_trading=live_trading, initial_capital=args.capital)
+
+    if not args.cold:
+        strategy.warm_state = WarmStateCache(HybridConfig(), args.state)
+        if strategy.warm_state.restore(strategy):
+            print(f"♻️  Warm state restored from {strategy.warm_state.path}")
+
+    if getattr(args, 'dashboard', None):
+        from dashboard_report import DashboardReportGenerator
+        strategy.dashboard = DashboardReportGenerator(args.dashboard)
+
+    print(f"⏱️  Ready in {time.perf_counter() - started:.3f}s")
+    return strategy
+
+
+def _save_trades(tracker, path):
+    """كتابة سجل الصفقات لأوامر report / train-model / monte-carlo --trades"""
+    if path:
+        tracker.save_trades(path)
+        print(f"💾 {len(tracker.trades)} trades saved to {path}")
+
+
+def _run_strategy(args, live_trading):
+    """تشغيل الحلقة الحية أو المحاكاة"""
+    if args.shards:
+        from sharded_runner import ShardSupervisor
+
+        supervisor = ShardSupervisor(live_trading, args.capital, args.shards)
+        try:
+            supervisor.run()
+        finally:
+            _save_trades(supervisor.central.performance_tracker, args.save_trades)
+            supervisor.central.generate_final_report()
+        return 0
+
+    strategy = _build_strategy(args, live_trading)
+    try:
+        strategy.run_strategy()
+    finally:
+        if strategy.warm_state:
+            strategy.warm_state.save(strategy)
+        if strategy.dashboard:
+            strategy.dashboard.render(strategy.performance_tracker, strategy.analyzer)
+        _save_trades(strategy.performance_tracker, args.save_trades)
+        strategy.generate_final_report()
+    return 0
+
+
+def cmd_live(args):
+    """التداول الحي"""
+    return _run_strategy(args, live_trading=True)
+
+
+def cmd_simulate(args):
+    """التداول بالمحاكاة"""
+    return _run_strategy(args, live_trading=False)
+
+
+def cmd_backtest(args):
+    """إعادة تشغيل المسار الحي على شموع مسجلة بساعة محاكاة"""
+    import json
+    from datetime import datetime
+    from hybrid_config import HybridConfig
+    from replay_driver import ReplayDriver, load_recording, record_bars
+
+    if args.record:
+        record_bars(HybridConfig(), args.period, args.record)
+        print(f"💾 Recorded {args.period} of bars to {args.record}")
+        return 0
+
+    if not args.bars:
+        print("❌ --bars (or --record) is required")
+        return 1
+
+    calendar_events = None
+    if args.calendar:
+        with open(args.calendar) as f:
+            calendar_events = json.load(f)
+
+    driver = ReplayDriver(
+        load_recording(args.bars),
+        start=datetime.fromisoformat(args.start) if args.start else None,
+        end=datetime.fromisoformat(args.end) if args.end else None,
+        calendar_events=calendar_events,
+        initial_capital=args.capital,
+        record_features=args.features
+    )
+
+    print(f"⏪ Replaying {driver.start} -> {driver.end}")
+    stats = driver.run(verbose=args.verbose)
+    print(f"✅ {stats['iterations']} cycles in {stats['wall_seconds']:.1f}s "
+          f"({stats['speedup']:.0f}x real time), {stats['trades']} trades")
+
+    strategy = driver.strategy
+    if strategy.dashboard is None and args.dashboard:
+        from dashboard_report import DashboardReportGenerator
+        DashboardReportGenerator(args.dashboard).render(strategy.performance_tracker, strategy.analyzer)
+    _save_trades(strategy.performance_tracker, args.save_trades)
+    strategy.generate_final_report()
+    return 0
+
+
+def cmd_host(args):
+    """تشغيل عدة نسخ من الاستراتيجية فوق طبقة بيانات مشتركة"""
+    import json
+    from strategy_host import StrategyHost
+
+    with open(args.variants) as f:
+        variants = json.load(f)
+
+    host = StrategyHost(variants, live_trading=args.live, initial_capital=args.capital)
+    try:
+        host.run()
+    finally:
+        host.generate_final_report()
+    return 0
+
+
+def cmd_report(args):
+    """طباعة تقرير الأداء من سجل محفوظ دون تحميل مكدس التداول"""
+    from performance_tracker import PerformanceTracker
+    from warm_state import WarmStateCache
+    from hybrid_config import HybridConfig
+
+    tracker = PerformanceTracker()
+    score_distribution = {}
+
+    if args.trades:
+        tracker.load_trades(args.trades)
+    else:
+        state = WarmStateCache(HybridConfig(), args.state).load()
+        if not state:
+            print(f"❌ No saved state at {args.state or HybridConfig.WARM_STATE_PATH}")
+            return 1
+        tracker.restore_trades(state['trades'])
+        score_distribution = state.get('score_distribution', {})
+
+    print(tracker.generate_report(args.period))
+
+    if args.html:
+        from types import SimpleNamespace
+        from dashboard_report import DashboardReportGenerator
+
+        # يكفي كائن خفيف يحمل توزيع النقاط بدلاً من بناء المحلل كاملاً
+        analyzer = SimpleNamespace(score_distribution=score_distribution)
+        DashboardReportGenerator(args.html).render(tracker, analyzer)
+        print(f"📊 Dashboard written to {args.html}")
+    return 0
+
+
+def cmd_train_model(args):
+    """تدريب نموذج جودة الإشارة من سجل الصفقات المغلقة"""
+    from hybrid_config import HybridConfig
+    from performance_tracker import PerformanceTracker
+    from signal_quality_model import SignalQualityModel
+    from warm_state import WarmStateCache
+
+    config = HybridConfig()
+    tracker = PerformanceTracker()
+
+    if args.trades:
+        tracker.load_trades(args.trades)
+    else:
+        state = WarmStateCache(config, args.state).load()
+        if not state:
+            print(f"❌ No saved state at {args.state or config.WARM_STATE_PATH}")
+            return 1
+        tracker.trades = state['trades']
+
+    model = SignalQualityModel(config)
+    try:
+        metrics = model.train_from_trades(tracker.trades)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    model.save(args.output)
+    print(f"🧠 Model trained on {len(tracker.trades)} trades, "
+          f"saved to {args.output or config.QUALITY_MODEL_PATH}")
+    print(f"   Held-out ({metrics['holdout_trades']} latest trades): accuracy {metrics['holdout_accuracy']:.2%}, "
+          f"win rate {metrics['holdout_win_rate']:.2%} vs mean predicted {metrics['holdout_mean_probability']:.2%}")
+    return 0
+
+
+def cmd_monte_carlo(args):
+    """تحليل مونت كارلو لتسلسل الصفقات المغلقة"""
+    from hybrid_config import HybridConfig
+    from monte_carlo import MonteCarloAnalyzer
+    from performance_tracker import PerformanceTracker
+    from warm_state import WarmStateCache
+
+    config = HybridConfig()
+    tracker = PerformanceTracker()
+
+    if args.trades:
+        tracker.load_trades(args.trades)
+    else:
+        state = WarmStateCache(config, args.state).load()
+        if not state:
+            print(f"❌ No saved state at {args.state or config.WARM_STATE_PATH}")
+            return 1
+        tracker.trades = state['trades']
+
+    analyzer = MonteCarloAnalyzer(config, args.capital)
+    started = time.perf_counter()
+    try:
+        results = analyzer.run(
+            tracker.trades, paths=args.paths, path_length=args.length, method=args.method,
+            block_size=args.block, workers=args.workers, seed=args.seed, base_risk=args.risk
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(analyzer.generate_report(results))
+    print(f"⏱️  {results['paths']:,} paths in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+def build_parser():
+    """بناء محلل سطر الأوامر"""
+    parser = argparse.ArgumentParser(
+        prog='hybrid-scalper',
+        description='Hybrid Confluence Scalper command line interface'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_strategy_options(subparser):
+        subparser.add_argument('--capital', type=float, default=10000,
+                               help='initial capital (default: 10000)')
+        subparser.add_argument('--state', default=None,
+                               help='warm state file (default: HybridConfig.WARM_STATE_PATH)')
+        subparser.add_argument('--cold', action='store_true',
+                               help='ignore the saved warm state')
+        subparser.add_argument('--dashboard', default=None,
+                               help='write an offline HTML dashboard to this path')
+        subparser.add_argument('--save-trades', default=None,
+                               help='write the trade log to this path on shutdown')
+
+    live = subparsers.add_parser('live', help='run the strategy against the broker')
+    add_strategy_options(live)
+    live.add_argument('--shards', type=int, default=0,
+                      help='split pairs across N worker processes')
+    live.set_defaults(func=cmd_live)
+
+    simulate = subparsers.add_parser('simulate', help='run the strategy with simulated execution')
+    add_strategy_options(simulate)
+    simulate.add_argument('--shards', type=int, default=0,
+                          help='split pairs across N worker processes')
+    simulate.set_defaults(func=cmd_simulate)
+
+    backtest = subparsers.add_parser('backtest', help='replay recorded bars through the live code path')
+    backtest.add_argument('--bars', default=None, help='recording written by --record')
+    backtest.add_argument('--record', default=None, help='download bars to this file and exit')
+    backtest.add_argument('--period', default='7d', help='period to record (default: 7d)')
+    backtest.add_argument('--calendar', default=None, help='economic calendar JSON to replay')
+    backtest.add_argument('--start', default=None, help='replay start, ISO format UTC')
+    backtest.add_argument('--end', default=None, help='replay end, ISO format UTC')
+    backtest.add_argument('--capital', type=float, default=10000)
+    backtest.add_argument('--features', action='store_true', help='write evaluated features to the feature store')
+    backtest.add_argument('--dashboard', default=None, help='write an offline HTML dashboard to this path')
+    backtest.add_argument('--save-trades', default=None, help='write the replayed trade log to this path')
+    backtest.add_argument('--verbose', action='store_true', help='show the strategy output')
+    backtest.set_defaults(func=cmd_backtest)
+
+    host = subparsers.add_parser('host', help='run several config variants on shared market data')
+    host.add_argument('--variants', required=True,
+                      help='JSON file mapping variant name to HybridConfig overrides')
+    host.add_argument('--capital', type=float, default=10000,
+                      help='initial capital per variant (default: 10000)')
+    host.add_argument('--live', action='store_true', help='execute through the broker')
+    host.set_defaults(func=cmd_host)
+
+    report = subparsers.add_parser('report', help='print a performance report')
+    report.add_argument('--period', choices=['ALL', 'WEEK', 'MONTH'], default='ALL')
+    report.add_argument('--state', default=None,
+                        help='warm state file to read trades from')
+    report.add_argument('--trades', default=None,
+                        help='trades file written by --save-trades')
+    report.add_argument('--html', default=None,
+                        help='also write an offline HTML dashboard to this path')
+    report.set_defaults(func=cmd_report)
+
+    train = subparsers.add_parser('train-model', help='train the signal quality model offline')
+    train.add_argument('--state', default=None,
+                       help='warm state file to read trades from')
+    train.add_argument('--trades', default=None,
+                       help='trades file written by --save-trades')
+    train.add_argument('--output', default=None,
+                       help='model file (default: HybridConfig.QUALITY_MODEL_PATH)')
+    train.set_defaults(func=cmd_train_model)
+
+    monte_carlo = subparsers.add_parser('monte-carlo', help='resample closed trades into equity paths')
+    monte_carlo.add_argument('--state', default=None,
+                             help='warm state file to read trades from')
+    monte_carlo.add_argument('--trades', default=None,
+                             help='trades file written by --save-trades')
+    monte_carlo.add_argument('--method', choices=['bootstrap', 'block', 'shuffle'], default='block',
+                             help='resampling method (default: block)')
+    monte_carlo.add_argument('--paths', type=int, default=None,
+                             help='number of paths (default: HybridConfig.MONTE_CARLO_PATHS)')
+    monte_carlo.add_argument('--length', type=int, default=None,
+                             help='trades per path (default: number of closed trades)')
+    monte_carlo.add_argument('--block', type=int, default=None,
+                             help='block length for --method block (default: HybridConfig.MONTE_CARLO_BLOCK_SIZE)')
+    monte_carlo.add_argument('--risk', type=float, default=None,
+                             help='base risk per trade (default: HybridConfig.BASE_RISK)')
+    monte_carlo.add_argument('--capital', type=float, default=10000)
+    monte_carlo.add_argument('--workers', type=int, default=1,
+                             help='worker processes (default: 1)')
+    monte_carlo.add_argument('--seed', type=int, default=None)
+    monte_carlo.set_defaults(func=cmd_monte_carlo)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,47 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+
+class SystemClock:
+    """ساعة النظام الحقيقية المستخدمة في التداول الحي"""
+
+    def now(self):
+        return datetime.now()
+
+    def utcnow(self):
+        return datetime.utcnow()
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class SimulatedClock:
+    """ساعة قابلة للتحكم لإعادة التشغيل: النوم يقدّم الوقت فوراً"""
+
+    def __init__(self, start):
+        # توقيت UTC بدون منطقة زمنية، مثل datetime.utcnow()
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def utcnow(self):
+        return self.current
+
+    def time(self):
+        return self.current.replace(tzinfo=timezone.utc).timestamp()
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        self.current += timedelta(seconds=seconds)
+
+    def set(self, moment):
+        self.current = moment
+
+
+SYSTEM_CLOCK = SystemClock()
\ No newline at end of file
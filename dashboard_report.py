@@ -0,0 +1,151 @@
+import hashlib
+import os
+import pickle
+from datetime import datetime
+
+
+class DashboardReportGenerator:
+    """مولّد لوحة HTML ثابتة تعمل دون اتصال من مجاميع محسوبة مسبقاً"""
+
+    PANEL_TITLES = {
+        'equity': 'Equity Curve',
+        'drawdown': 'Drawdown',
+        'pair': 'P&L by Pair',
+        'quality': 'P&L by Signal Quality',
+        'kill_zone': 'P&L by Kill Zone',
+        'score_distribution': 'Hybrid Score Distribution'
+    }
+
+    def __init__(self, output_path='reports/dashboard.html'):
+        self.output_path = output_path
+        self.panel_hashes = {}
+        self.panel_html = {}
+        self._plotly_js = None
+
+    def collect_panels(self, performance_tracker, analyzer=None):
+        """جمع بيانات اللوحات من المجاميع فقط دون قائمة الصفقات الخام"""
+        analytics = performance_tracker.analytics
+        curve = analytics.equity_curve.to_list()
+        breakdowns = analytics.breakdowns()
+
+        # توزيع النقاط من المحلل إن توفر، وإلا من فئات نقاط الصفقات المغلقة
+        if analyzer is not None and analyzer.score_distribution:
+            scores = sorted(analyzer.score_distribution.items())
+        else:
+            scores = sorted(
+                (bucket, stats['count']) for bucket, stats in breakdowns['score_bucket'].items()
+            )
+
+        return {
+            'equity': [(point[0], point[1]) for point in curve],
+            'drawdown': [(point[0], point[2]) for point in curve],
+            'pair': breakdowns['pair'],
+            'quality': breakdowns['quality'],
+            'kill_zone': breakdowns['kill_zone'],
+            'score_distribution': scores
+        }
+
+    def _render_panel(self, name, data):
+        """رسم لوحة واحدة كجزء HTML"""
+        import plotly.graph_objects as go
+
+        title = self.PANEL_TITLES[name]
+
+        if name in ('equity', 'drawdown'):
+            x = [point[0] for point in data]
+            y = [point[1] for point in data]
+            fig = go.Figure(go.Scattergl(
+                x=x, y=y, mode='lines',
+                fill='tozeroy' if name == 'drawdown' else None,
+                line={'color': '#d62728' if name == 'drawdown' else '#1f77b4'}
+            ))
+        elif name == 'score_distribution':
+            fig = go.Figure(go.Bar(
+                x=[str(score) for score, _ in data],
+                y=[count for _, count in data]
+            ))
+        else:
+            keys = list(data.keys())
+            fig = go.Figure(go.Bar(
+                x=[str(key) for key in keys],
+                y=[data[key]['total_pnl'] for key in keys],
+                text=[f"{data[key]['count']} trades, {data[key]['win_rate']:.0%} win" for key in keys],
+                marker_color=['#2ca02c' if data[key]['total_pnl'] >= 0 else '#d62728' for key in keys]
+            ))
+
+        fig.update_layout(title=title, height=360, margin={'l': 40, 'r': 20, 't': 50, 'b': 40})
+        return fig.to_html(full_html=False, include_plotlyjs=False, div_id=f"panel-{name}")
+
+    def _get_plotly_js(self):
+        """مكتبة plotly.js مضمنة لتعمل اللوحة دون اتصال"""
+        if self._plotly_js is None:
+            from plotly.offline import get_plotlyjs
+            self._plotly_js = get_plotlyjs()
+        return self._plotly_js
+
+    def render(self, performance_tracker, analyzer=None):
+        """توليد اللوحة وإعادة رسم اللوحات المتغيرة فقط"""
+        panels = self.collect_panels(performance_tracker, analyzer)
+        redrawn = []
+
+        for name, data in panels.items():
+            digest = hashlib.sha1(pickle.dumps(data)).hexdigest()
+            if self.panel_hashes.get(name) == digest:
+                continue
+
+            self.panel_html[name] = self._render_panel(name, data)
+            self.panel_hashes[name] = digest
+            redrawn.append(name)
+
+        if redrawn or not os.path.exists(self.output_path):
+            self._write_page(performance_tracker)
+
+        return redrawn
+
+    def _write_page(self, performance_tracker):
+        """كتابة الصفحة الكاملة من الأجزاء المخزنة"""
+        summary = performance_tracker.analytics.query('ALL')
+        if summary:
+            headline = (f"{summary['total_trades']} trades &middot; "
+                        f"P&amp;L ${summary['total_pnl']:,.2f} &middot; "
+                        f"Win rate {summary['win_rate']:.1%} &middot; "
+                        f"Max DD ${summary['max_drawdown']:,.2f} &middot; "
+                        f"Sharpe {summary['sharpe']:.2f}")
+        else:
+            headline = "No closed trades yet"
+
+        body = "\n".join(
+            f'<div class="panel">{self.panel_html[name]}</div>'
+            for name in self.PANEL_TITLES if name in self.panel_html
+        )
+
+        page = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Hybrid Confluence Scalper - Dashboard</title>
+<script type="text/javascript">{self._get_plotly_js()}</script>
+<style>
+body {{ font-family: sans-serif; margin: 20px; background: #fafafa; }}
+.grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(520px, 1fr)); gap: 16px; }}
+.panel {{ background: #fff; border: 1px solid #ddd; padding: 8px; }}
+</style>
+</head>
+<body>
+<h1>Hybrid Confluence Scalper</h1>
+<p>{headline}</p>
+<p><small>Generated {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</small></p>
+<div class="grid">
+{body}
+</div>
+</body>
+</html>"""
+
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.output_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(page)
+        os.replace(tmp_path, self.output_path)
\ No newline at end of file
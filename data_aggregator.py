@@ -1,35 +1,58 @@
-import yfinance as yf
-import pandas as pd
-import numpy as np
-from talib import EMA, RSI, ATR
-import time
+from clock import SYSTEM_CLOCK
+from data_validator import MarketDataValidator
+from fetch_layer import ResilientFetcher
 
 class DataAggregator:
     """مجمع البيانات متعددة الأطر الزمنية"""
     
-    def __init__(self, config):
+    def __init__(self, config, clock=None, fetcher=None):
         self.config = config
+        self.clock = clock or SYSTEM_CLOCK
+        self.fetcher = fetcher or ResilientFetcher(config, self.clock)
+        self.validator = MarketDataValidator(config)
         self.data_cache = {}
+        self.cache_times = {}
+        # المؤشرات المحسوبة لكل (زوج، إطار، مجموعة معاملات)
+        self.indicator_cache = {}
+        self.stale = {}  # cache_key -> البيانات من آخر تحميل ناجح بعد فشل المصدر
+        self.pinned = False  # تثبيت البيانات حتى التحديث التالي (وضع المضيف)
+        self.stats = {'downloads': 0, 'indicator_runs': 0, 'indicator_hits': 0}
     
-    def get_multi_timeframe_data(self, pair, period='5d'):
+    def get_multi_timeframe_data(self, pair, period='5d', config=None):
         """جمع بيانات متعددة الأطر الزمنية"""
+        config = config or self.config
         yf_symbol = f"{pair[:3]}=X"
         multi_tf_data = {}
         
-        for tf_name, tf_interval in self.config.TIMEFRAMES.items():
+        for tf_name, tf_interval in config.TIMEFRAMES.items():
             try:
                 # استخدام cache لتجنب الطلبات المتكررة
                 cache_key = f"{pair}_{tf_name}"
-                if cache_key in self.data_cache:
+                if self._is_cache_fresh(cache_key):
                     data = self.data_cache[cache_key]
                 else:
-                    data = yf.download(yf_symbol, period=period, interval=tf_interval)
+                    # عند تعطل المصدر تُستخدم آخر شموع صالحة حتى FETCH_MAX_STALE_SECONDS
+                    fetch_key = f"yf:{yf_symbol}:{tf_interval}:{period}"
+                    requested_at = self.clock.time()
+                    data = self.fetcher.fetch(
+                        fetch_key,
+                        lambda: self._download(yf_symbol, period, tf_interval),
+                        endpoint='yfinance',
+                        max_stale=self.config.FETCH_MAX_STALE_SECONDS
+                    )
+                    # إصلاح الشموع مرة واحدة لكل تحميل قبل التخزين والمؤشرات
+                    data = self.validator.validate(data, pair, tf_name, tf_interval)
                     self.data_cache[cache_key] = data
+                    
+                    # الختم بوقت التحميل الفعلي حتى لا تُعامل الشموع القديمة كحديثة
+                    fetched_at = self.fetcher.fetched_at(fetch_key)
+                    self.cache_times[cache_key] = fetched_at
+                    self.stale[cache_key] = fetched_at < requested_at
+                    self.stats['downloads'] += 1
                 
                 if not data.empty:
                     # إضافة المؤشرات التقنية
-                    data = self._add_technical_indicators(data, tf_name)
-                    multi_tf_data[tf_name] = data
+                    multi_tf_data[tf_name] = self._get_indicator_frame(cache_key, data, tf_name, config)
                     
             except Exception as e:
                 print(f"Error fetching {tf_name} data for {pair}: {e}")
@@ -37,23 +60,73 @@ class DataAggregator:
         
         return multi_tf_data
     
-    def _add_technical_indicators(self, df, timeframe):
+    def is_stale(self, pair, config=None):
+        """هل أحد أطر الزوج من بيانات احتياطية قديمة؟"""
+        config = config or self.config
+        return any(self.stale.get(f"{pair}_{tf_name}") for tf_name in config.TIMEFRAMES)
+    
+    def _download(self, yf_symbol, period, interval):
+        """تحميل الشموع من yfinance مع اعتبار النتيجة الفارغة فشلاً"""
+        # استيراد متأخر: yfinance ثقيل ولا يلزم إلا عند التحميل الفعلي
+        import yfinance as yf
+        
+        data = yf.download(yf_symbol, period=period, interval=interval,
+                           timeout=self.config.FETCH_TIMEOUT[1], progress=False)
+        if data is None or data.empty:
+            raise ValueError(f"empty response for {yf_symbol} {interval}")
+        return data
+    
+    def _is_cache_fresh(self, cache_key):
+        """التحقق من حداثة البيانات المخزنة"""
+        if cache_key not in self.data_cache:
+            return False
+        if self.pinned:
+            return True
+        cached_at = self.cache_times.get(cache_key, 0)
+        return self.clock.time() - cached_at < self.config.DATA_CACHE_TTL
+    
+    @staticmethod
+    def indicator_params(config):
+        """مفتاح مجموعة معاملات المؤشرات"""
+        return (tuple(config.EMA_PERIODS), config.RSI_PERIOD, config.ATR_PERIOD, config.SWING_WINDOW)
+    
+    def _get_indicator_frame(self, cache_key, data, tf_name, config):
+        """حساب المؤشرات مرة واحدة لكل نسخة بيانات خام ومجموعة معاملات"""
+        key = (cache_key, self.indicator_params(config))
+        stamp = self.cache_times.get(cache_key)
+        
+        cached = self.indicator_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            self.stats['indicator_hits'] += 1
+            return cached[1]
+        
+        # نسخة حتى لا تتداخل أعمدة مجموعات المعاملات المختلفة في البيانات الخام
+        frame = self._add_technical_indicators(data.copy(), tf_name, config)
+        self.indicator_cache[key] = (stamp, frame)
+        self.stats['indicator_runs'] += 1
+        return frame
+    
+    def _add_technical_indicators(self, df, timeframe, config=None):
         """إضافة المؤشرات التقنية للبيانات"""
+        from talib import EMA, RSI, ATR
+        
+        config = config or self.config
+        
         # المتوسطات المتحركة
-        for period in [20, 50, 200]:
+        for period in config.EMA_PERIODS:
             df[f'EMA_{period}'] = EMA(df['Close'], timeperiod=period)
         
         # RSI
-        df['RSI'] = RSI(df['Close'], timeperiod=14)
+        df['RSI'] = RSI(df['Close'], timeperiod=config.RSI_PERIOD)
         
         # ATR للتقلبات
-        df['ATR'] = ATR(df['High'], df['Low'], df['Close'], timeperiod=14)
+        df['ATR'] = ATR(df['High'], df['Low'], df['Close'], timeperiod=config.ATR_PERIOD)
         
         # حساب الزخم
         df['Momentum_5'] = df['Close'] / df['Close'].shift(5) - 1
         
         # تحديد القمم والقيعان
-        df = self._find_swing_points(df)
+        df = self._find_swing_points(df, config.SWING_WINDOW)
         
         return df
     
@@ -88,28 +161,38 @@ class DataAggregator:
                 return 'NORMAL'
         return 'NORMAL'
     
-    def detect_trend_strength(self, df):
+    @staticmethod
+    def trend_ema_columns(config):
+        """أعمدة المتوسطات السريع والمتوسط والبطيء حسب EMA_PERIODS"""
+        periods = sorted(config.EMA_PERIODS)
+        if len(periods) < 3:
+            return None
+        return [f'EMA_{period}' for period in (periods[0], periods[len(periods) // 2], periods[-1])]
+    
+    def detect_trend_strength(self, df, config=None):
         """كشف قوة الاتجاه"""
-        if 'EMA_50' not in df.columns or 'EMA_200' not in df.columns:
+        columns = self.trend_ema_columns(config or self.config)
+        if columns is None or any(column not in df.columns for column in columns):
             return 'NEUTRAL'
         
         current_price = df['Close'].iloc[-1]
-        ema_20 = df['EMA_20'].iloc[-1]
-        ema_50 = df['EMA_50'].iloc[-1]
-        ema_200 = df['EMA_200'].iloc[-1]
+        fast_ema, mid_ema, slow_ema = (df[column].iloc[-1] for column in columns)
         
         # ترتيب المتوسطات المتحركة
-        if current_price > ema_20 > ema_50 > ema_200:
+        if current_price > fast_ema > mid_ema > slow_ema:
             return 'STRONG_BULLISH'
-        elif current_price < ema_20 < ema_50 < ema_200:
+        elif current_price < fast_ema < mid_ema < slow_ema:
             return 'STRONG_BEARISH'
-        elif current_price > ema_50 > ema_200:
+        elif current_price > mid_ema > slow_ema:
             return 'BULLISH'
-        elif current_price < ema_50 < ema_200:
+        elif current_price < mid_ema < slow_ema:
             return 'BEARISH'
         else:
             return 'NEUTRAL'
     
     def clear_cache(self):
         """مسح الذاكرة المؤقتة"""
-        self.data_cache.clear()
\ No newline at end of file
+        self.data_cache.clear()
+        self.cache_times.clear()
+        self.stale.clear()
+        self.indicator_cache.clear()
\ No newline at end of file
@@ -0,0 +1,183 @@
+WEEK_SECONDS = 7 * 86400
+NS = 1_000_000_000
+
+
+class MarketDataValidator:
+    """تنظيف وإصلاح شموع yfinance قبل حساب المؤشرات، بعمليات NumPy على كل دفعة"""
+
+    PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+    # علامات الشموع في عمود bar_flag
+    FLAG_FILLED = 1       # شمعة مضافة لسد فجوة
+    FLAG_ZERO_RANGE = 2   # High == Low
+    FLAG_REPAIRED = 4     # قيم مفقودة أو OHLC غير متسق
+
+    COUNTERS = ['batches', 'rows_in', 'rows_out', 'duplicates', 'unsorted', 'weekend',
+                'bad_prices', 'ohlc_repaired', 'zero_range', 'gaps', 'missing_bars', 'filled_bars']
+
+    def __init__(self, config):
+        self.config = config
+        self.counters = {}  # (زوج، إطار) -> عدادات جودة البيانات
+
+        # نافذة إغلاق السوق الأسبوعية بالثواني من بداية الأسبوع (الاثنين 00:00 UTC)
+        close_day, close_hour = config.FX_WEEK_CLOSE
+        open_day, open_hour = config.FX_WEEK_OPEN
+        self.close_offset = close_day * 86400 + close_hour * 3600
+        self.closed_length = open_day * 86400 + open_hour * 3600 - self.close_offset
+
+    @staticmethod
+    def interval_seconds(interval):
+        """'5m' -> 300"""
+        units = {'m': 60, 'h': 3600, 'd': 86400}
+        return int(interval[:-1]) * units[interval[-1]]
+
+    @staticmethod
+    def normalize_columns(df):
+        """أعمدة yfinance متعددة المستويات ('Close', 'EURUSD=X') -> 'Close'"""
+        if getattr(df.columns, 'nlevels', 1) > 1:
+            df = df.copy()
+            df.columns = df.columns.get_level_values(0)
+        df = df.loc[:, ~df.columns.duplicated()]
+        return df.rename(columns={name: name.title() for name in df.columns if isinstance(name, str)})
+
+    def _seconds_of_week(self, seconds):
+        # 1970-01-01 كان خميساً، فالإزاحة 3 أيام تجعل الأسبوع يبدأ الاثنين
+        return (seconds + 3 * 86400) % WEEK_SECONDS
+
+    def _is_closed(self, seconds):
+        offset = self._seconds_of_week(seconds) - self.close_offset
+        return (offset >= 0) & (offset < self.closed_length)
+
+    def _closed_before(self, seconds):
+        """ثواني إغلاق السوق المتراكمة حتى اللحظة، لطرحها من الفجوات"""
+        import numpy as np
+
+        weeks = (seconds + 3 * 86400) // WEEK_SECONDS
+        offset = self._seconds_of_week(seconds) - self.close_offset
+        return weeks * self.closed_length + np.clip(offset, 0, self.closed_length)
+
+    def get_counters(self, pair=None):
+        if pair is None:
+            return self.counters
+        return {key: counters for key, counters in self.counters.items() if key[0] == pair}
+
+    def totals(self):
+        """مجموع العدادات لكل الأزواج والأطر"""
+        totals = dict.fromkeys(self.COUNTERS, 0)
+        for counters in self.counters.values():
+            for name, value in counters.items():
+                totals[name] += value
+        return totals
+
+    def validate(self, df, pair, timeframe, interval):
+        """تطبيع، ترتيب، إزالة التكرار، حذف شموع عطلة نهاية الأسبوع، إصلاح وسد الفجوات الصغيرة"""
+        import numpy as np
+        import pandas as pd
+
+        counters = self.counters.setdefault((pair, timeframe), dict.fromkeys(self.COUNTERS, 0))
+        counters['batches'] += 1
+        counters['rows_in'] += len(df)
+
+        df = self.normalize_columns(df)
+        if df.empty or not set(self.PRICE_COLUMNS).issubset(df.columns):
+            return df
+
+        tz = df.index.tz
+        index = df.index.tz_convert('UTC').tz_localize(None) if tz is not None else df.index
+        times = index.values.astype('datetime64[ns]').view(np.int64).copy()
+        prices = df[self.PRICE_COLUMNS].to_numpy(dtype=np.float64, copy=True)
+        volume = df['Volume'].to_numpy(dtype=np.float64, copy=True) if 'Volume' in df.columns \
+            else np.zeros(len(times))
+
+        # ترتيب زمني ثابت حتى يبقى آخر تكرار هو الأحدث
+        if np.any(np.diff(times) < 0):
+            counters['unsorted'] += 1
+            order = np.argsort(times, kind='stable')
+            times, prices, volume = times[order], prices[order], volume[order]
+
+        # التكرار: الاحتفاظ بآخر نسخة من كل توقيت
+        keep = np.append(times[1:] != times[:-1], True)
+
+        # شموع خلال إغلاق السوق الأسبوعي
+        weekend = self._is_closed(times // NS)
+        counters['duplicates'] += int((~keep).sum())
+        counters['weekend'] += int((weekend & keep).sum())
+        keep &= ~weekend
+
+        times, prices, volume = times[keep], prices[keep], volume[keep]
+        if not len(times):
+            return df.iloc[0:0]
+
+        flags = np.zeros(len(times), dtype=np.int8)
+
+        # أسعار مفقودة أو غير موجبة: إغلاق سابق بدلاً منها
+        bad = ~np.isfinite(prices) | (prices <= 0)
+        bad_rows = bad.any(axis=1)
+        if bad_rows.any():
+            counters['bad_prices'] += int(bad_rows.sum())
+            prices[bad] = np.nan
+            close = prices[:, 3]
+            valid = np.where(np.isfinite(close), np.arange(len(close)), 0)
+            close = close[np.maximum.accumulate(valid)]
+            prices = np.where(np.isnan(prices), close[:, None], prices)
+            flags[bad_rows] |= self.FLAG_REPAIRED
+
+            # صفوف في البداية بلا أي سعر سابق
+            usable = np.isfinite(prices).all(axis=1)
+            times, prices, volume, flags = times[usable], prices[usable], volume[usable], flags[usable]
+            if not len(times):
+                return df.iloc[0:0]
+
+        # High/Low يجب أن يحيطا بـ Open/Close
+        high = prices.max(axis=1)
+        low = prices.min(axis=1)
+        inconsistent = (high != prices[:, 1]) | (low != prices[:, 2])
+        if inconsistent.any():
+            counters['ohlc_repaired'] += int(inconsistent.sum())
+            prices[:, 1], prices[:, 2] = high, low
+            flags[inconsistent] |= self.FLAG_REPAIRED
+
+        zero_range = prices[:, 1] == prices[:, 2]
+        counters['zero_range'] += int(zero_range.sum())
+        flags[zero_range] |= self.FLAG_ZERO_RANGE
+
+        # الفجوات مقاسة بزمن السوق المفتوح فقط
+        step = self.interval_seconds(interval)
+        seconds = times // NS
+        open_elapsed = np.diff(seconds) - np.diff(self._closed_before(seconds))
+        missing = np.maximum(np.rint(open_elapsed / step).astype(np.int64) - 1, 0)
+        gap_rows = np.flatnonzero(missing)
+        counters['gaps'] += len(gap_rows)
+        counters['missing_bars'] += int(missing.sum())
+
+        # سد الفجوات القصيرة داخل الجلسة بشموع مسطحة على آخر إغلاق
+        raw_missing = np.diff(seconds) // step - 1
+        fillable = gap_rows[raw_missing[gap_rows] <= self.config.DATA_MAX_FILL_BARS]
+        if len(fillable):
+            counts = raw_missing[fillable]
+            source = np.repeat(fillable, counts)
+            position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+            fill_times = times[source] + position * step * NS
+
+            in_session = ~self._is_closed(fill_times // NS)
+            source, fill_times = source[in_session], fill_times[in_session]
+            counters['filled_bars'] += len(fill_times)
+
+            times = np.concatenate([times, fill_times])
+            prices = np.concatenate([prices, np.repeat(prices[source, 3:4], 4, axis=1)])
+            volume = np.concatenate([volume, np.zeros(len(fill_times))])
+            flags = np.concatenate([flags, np.full(len(fill_times), self.FLAG_FILLED, dtype=np.int8)])
+
+            order = np.argsort(times, kind='stable')
+            times, prices, volume, flags = times[order], prices[order], volume[order], flags[order]
+
+        counters['rows_out'] += len(times)
+
+        index = pd.DatetimeIndex(times.astype('datetime64[ns]'), name=df.index.name)
+        if tz is not None:
+            index = index.tz_localize('UTC').tz_convert(tz)
+
+        result = pd.DataFrame(prices, index=index, columns=self.PRICE_COLUMNS)
+        result['Volume'] = volume
+        result['bar_flag'] = flags
+        return result
\ No newline at end of file
@@ -1,12 +1,14 @@
-import time
-from datetime import datetime
+from clock import SYSTEM_CLOCK
 
 class ExecutionHandler:
     """معالج تنفيذ الصفقات"""
     
-    def __init__(self, live_trading=False, broker_api=None):
+    def __init__(self, live_trading=False, broker_api=None, clock=None, position_manager=None):
         self.live_trading = live_trading
         self.broker_api = broker_api
+        self.clock = clock or SYSTEM_CLOCK
+        self.position_manager = position_manager
+        self.order_counter = 0
         self.pending_orders = []
         self.active_trades = []
     
@@ -26,7 +28,7 @@ class ExecutionHandler:
                 'position_size': position_size,
                 'quality': trade_signal['quality'],
                 'score': trade_signal['score'],
-                'timestamp': datetime.now(),
+                'timestamp': self.clock.now(),
                 'status': 'PENDING'
             }
             
@@ -53,14 +55,14 @@ class ExecutionHandler:
             # هنا يتم دمج API الوسيط الحقيقي
             # هذا مثال افتراضي
             order_result = {
-                'order_id': f"ORD_{int(time.time())}",
+                'order_id': self._next_order_id('ORD'),
                 'status': 'EXECUTED',
                 'executed_price': execution_details['entry_price'],
-                'execution_time': datetime.now()
+                'execution_time': self.clock.now()
             }
             
             # إضافة الصفقة للقائمة النشطة
-            self.active_trades.append({
+            self._add_active_trade({
                 **execution_details,
                 **order_result
             })
@@ -74,10 +76,10 @@ class ExecutionHandler:
         """تنفيذ محاكاة"""
         # محاكاة التنفيذ بسعر السوق الحالي
         simulated_result = {
-            'order_id': f"SIM_{int(time.time())}",
+            'order_id': self._next_order_id('SIM'),
             'status': 'EXECUTED',
             'executed_price': execution_details['entry_price'],
-            'execution_time': datetime.now(),
+            'execution_time': self.clock.now(),
             'commission': 0.0002,  # عمولة افتراضية
             'slippage': 0.0001    # انزلاق افتراضي
         }
@@ -88,19 +90,50 @@ class ExecutionHandler:
         else:
             simulated_result['executed_price'] -= simulated_result['slippage']
         
-        self.active_trades.append({
+        self._add_active_trade({
             **execution_details,
             **simulated_result
         })
         
         return simulated_result
     
-    def monitor_trades(self):
+    def _next_order_id(self, prefix):
+        """معرف أمر فريد حتى لعدة أوامر في نفس الثانية"""
+        self.order_counter += 1
+        return f"{prefix}_{int(self.clock.time())}_{self.order_counter}"
+    
+    def _add_active_trade(self, trade):
+        """إضافة صفقة منفذة للقائمة النشطة ولمدير المراكز"""
+        self.active_trades.append(trade)
+        if self.position_manager:
+            self.position_manager.open_position(trade)
+    
+    def restore_active_trades(self, trades, order_counter=0, positions=None):
+        """استعادة الصفقات المفتوحة بعد إعادة التشغيل مع حالة إدارة مراكزها"""
+        self.active_trades = list(trades)
+        self.order_counter = max(self.order_counter, order_counter)
+        
+        if self.position_manager:
+            order_ids = {trade['order_id'] for trade in trades}
+            missing = self.position_manager.restore(positions, order_ids) if positions else order_ids
+            for trade in trades:
+                if trade['order_id'] in missing:
+                    self.position_manager.open_position(trade)
+    
+    def monitor_trades(self, price_updates=None):
         """مراقبة الصفقات النشطة"""
         completed_trades = []
         
+        # price_updates: {زوج: شموع مغلقة بالترتيب} لتطبيق قواعد إدارة المراكز
+        closures = {}
+        if self.position_manager and price_updates:
+            for pair, bars in price_updates.items():
+                for bar in bars:
+                    for closure in self.position_manager.update(pair, **bar):
+                        closures[closure['order_id']] = closure
+        
         for trade in self.active_trades[:]:
-            current_status = self._check_trade_status(trade)
+            current_status = closures.get(trade['order_id']) or self._check_trade_status(trade)
             
             if current_status['status'] in ['CLOSED', 'STOPPED', 'TAKEN']:
                 completed_trades.append({**trade, **current_status})
@@ -133,7 +166,9 @@ class ExecutionHandler:
                     # تنفيذ محاكاة
                     trade['exit_reason'] = reason
                     trade['status'] = 'CLOSED'
-                    trade['exit_time'] = datetime.now()
+                    trade['exit_time'] = self.clock.now()
                 
+                if self.position_manager:
+                    self.position_manager.remove(order_id)
                 return True
         return False
\ No newline at end of file
@@ -0,0 +1,207 @@
+import glob
+import json
+import os
+from datetime import timezone
+from clock import SYSTEM_CLOCK
+from data_aggregator import DataAggregator
+from signal_quality_model import SignalQualityModel
+
+
+class FeatureStore:
+    """سجل أعمدة على القرص لخصائص كل (زوج، شمعة) تم تقييمها"""
+
+    TREND_CODES = ['NEUTRAL', 'BULLISH', 'STRONG_BULLISH', 'BEARISH', 'STRONG_BEARISH']
+    VOLATILITY_CODES = ['NORMAL', 'LOW', 'HIGH']
+    KILL_ZONE_CODES = [None, 'London Open', 'New York Open', 'London-NY Overlap']
+
+    def __init__(self, config, root=None, writer_id='main', clock=None):
+        self.config = config
+        self.clock = clock or SYSTEM_CLOCK
+        self.root = root or config.FEATURE_STORE_PATH
+        self.writer_id = writer_id
+        self.flag_names = list(config.SCORING_SYSTEM.keys())
+
+        self.buffer = []
+        self.last_bar = {}  # pair -> آخر شمعة مسجلة لتجنب التكرار كل دقيقة
+        self.segments = self._load_index()
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.root, f"index_{self.writer_id}.json")
+
+    def _load_index(self):
+        """فهرس المقاطع الخاص بهذا الكاتب"""
+        if not os.path.exists(self._index_path):
+            return []
+        with open(self._index_path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _to_ns(value):
+        """تحويل أي توقيت إلى نانوثانية UTC"""
+        if hasattr(value, 'value'):  # pandas.Timestamp
+            return int(value.value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1_000_000_000)
+
+    @staticmethod
+    def _code(codes, value):
+        return codes.index(value) if value in codes else 0
+
+    def record_evaluation(self, pair, market_data, analyzer, data_aggregator, kill_zone=None):
+        """بناء متجه الخصائص من تقييم HybridAnalyzer الأخير وإضافته"""
+        # صف ناقص أسوأ من صف غائب: تخطي التقييمات التي فشل جلب أحد أطرها
+        if any(tf not in market_data for tf in ('M5', 'M15', 'H1')):
+            return False
+
+        m5 = market_data['M5']
+        bar_time = m5.index[-1]
+        if self.last_bar.get(pair) == bar_time:
+            return False
+        self.last_bar[pair] = bar_time
+
+        hit = {SignalQualityModel.DETAIL_FEATURES.get(detail) for detail in analyzer.score_details}
+        flags = {name: name in hit for name in self.flag_names}
+
+        # ترتيب المتوسطات حسب EMA_PERIODS الخاصة بهذه الإعدادات
+        columns = DataAggregator.trend_ema_columns(self.config)
+        ema_alignment = 0
+        if columns is not None and all(column in m5.columns for column in columns):
+            fast, mid, slow = (m5[column].iloc[-1] for column in columns)
+            if fast > mid > slow:
+                ema_alignment = 1
+            elif fast < mid < slow:
+                ema_alignment = -1
+
+        self.append({
+            'bar_time': self._to_ns(bar_time),
+            'eval_time': self._to_ns(self.clock.utcnow()),
+            'pair': pair,
+            'score': analyzer.confluence_score,
+            'trend_strength': self._code(self.TREND_CODES, data_aggregator.detect_trend_strength(market_data['H1'])),
+            'volatility_regime': self._code(self.VOLATILITY_CODES, data_aggregator.calculate_market_volatility(market_data['M15'])),
+            'kill_zone': self._code(self.KILL_ZONE_CODES, kill_zone),
+            'rsi': m5['RSI'].iloc[-1],
+            'atr': m5['ATR'].iloc[-1],
+            'close': m5['Close'].iloc[-1],
+            'ema_alignment': ema_alignment,
+            **{f'flag_{name}': flag for name, flag in flags.items()}
+        })
+        return True
+
+    def append(self, row):
+        """إضافة صف للذاكرة والكتابة على دفعات"""
+        self.buffer.append(row)
+        if len(self.buffer) >= self.config.FEATURE_STORE_BATCH_SIZE:
+            self.flush()
+
+    def _columns_from_rows(self, rows):
+        """تحويل الصفوف إلى أعمدة بأنواع مضغوطة مرتبة زمنياً"""
+        import numpy as np
+
+        rows = sorted(rows, key=lambda row: row['bar_time'])
+        columns = {
+            'bar_time': np.array([row['bar_time'] for row in rows], dtype=np.int64),
+            'eval_time': np.array([row['eval_time'] for row in rows], dtype=np.int64),
+            'pair': np.array([row['pair'] for row in rows], dtype='U8'),
+            'score': np.array([row['score'] for row in rows], dtype=np.int8),
+            'trend_strength': np.array([row['trend_strength'] for row in rows], dtype=np.int8),
+            'volatility_regime': np.array([row['volatility_regime'] for row in rows], dtype=np.int8),
+            'kill_zone': np.array([row['kill_zone'] for row in rows], dtype=np.int8),
+            'ema_alignment': np.array([row['ema_alignment'] for row in rows], dtype=np.int8),
+            'rsi': np.array([row['rsi'] for row in rows], dtype=np.float32),
+            'atr': np.array([row['atr'] for row in rows], dtype=np.float32),
+            'close': np.array([row['close'] for row in rows], dtype=np.float64)
+        }
+        for name in self.flag_names:
+            columns[f'flag_{name}'] = np.array([row[f'flag_{name}'] for row in rows], dtype=np.bool_)
+        return columns
+
+    def flush(self):
+        """كتابة الصفوف المخزنة كمقطع جديد وتحديث الفهرس"""
+        if not self.buffer:
+            return
+
+        import numpy as np
+
+        columns = self._columns_from_rows(self.buffer)
+        os.makedirs(self.root, exist_ok=True)
+
+        file_name = f"seg_{self.writer_id}_{len(self.segments):06d}.npz"
+        np.savez(os.path.join(self.root, file_name), **columns)
+
+        self.segments.append({
+            'file': file_name,
+            'start': int(columns['bar_time'][0]),
+            'end': int(columns['bar_time'][-1]),
+            'rows': len(self.buffer)
+        })
+
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.segments, f)
+        os.replace(tmp_path, self._index_path)
+
+        self.buffer = []
+
+    def _all_segments(self):
+        """مقاطع كل الكتّاب (العملية الرئيسية وعمال الشظايا)"""
+        segments = []
+        for index_path in glob.glob(os.path.join(self.root, 'index_*.json')):
+            if index_path == self._index_path:
+                continue
+            with open(index_path) as f:
+                segments.extend(json.load(f))
+        return segments + self.segments
+
+    def read(self, start=None, end=None, pairs=None, columns=None):
+        """قراءة نطاق زمني: تُفتح المقاطع المتقاطعة فقط ويُقص كل منها بحث ثنائي"""
+        import numpy as np
+
+        start_ns = self._to_ns(start) if start is not None else None
+        end_ns = self._to_ns(end) if end is not None else None
+
+        def select(source, names):
+            # bar_time و pair مطلوبان دائماً للفلترة
+            wanted = set(columns) | {'bar_time', 'pair'} if columns else names
+            return {name: source[name] for name in names if name in wanted}
+
+        chunks = []
+        for segment in self._all_segments():
+            if start_ns is not None and segment['end'] < start_ns:
+                continue
+            if end_ns is not None and segment['start'] > end_ns:
+                continue
+            with np.load(os.path.join(self.root, segment['file'])) as data:
+                chunks.append(select(data, data.files))
+
+        # الصفوف التي لم تُكتب بعد
+        if self.buffer:
+            pending = self._columns_from_rows(self.buffer)
+            chunks.append(select(pending, list(pending.keys())))
+
+        result = {}
+        for chunk in chunks:
+            times = chunk['bar_time']
+            lo = np.searchsorted(times, start_ns, side='left') if start_ns is not None else 0
+            hi = np.searchsorted(times, end_ns, side='right') if end_ns is not None else len(times)
+
+            rows = np.arange(lo, hi)
+            if pairs is not None:
+                rows = rows[np.isin(chunk['pair'][lo:hi], list(pairs))]
+
+            for name, values in chunk.items():
+                result.setdefault(name, []).append(values[rows])
+
+        return {name: np.concatenate(parts) for name, parts in result.items()}
+
+    def to_dataframe(self, start=None, end=None, pairs=None):
+        """قراءة كـ DataFrame للبحث وضبط العتبات"""
+        import pandas as pd
+
+        df = pd.DataFrame(self.read(start, end, pairs))
+        if not df.empty:
+            df['bar_time'] = pd.to_datetime(df['bar_time'], utc=True)
+            df = df.sort_values('bar_time').reset_index(drop=True)
+        return df
\ No newline at end of file
@@ -0,0 +1,303 @@
+import random
+import threading
+from urllib.parse import urlparse
+from clock import SYSTEM_CLOCK
+
+
+class FetchUnavailable(Exception):
+    """لا توجد بيانات حديثة ولا بيانات سابقة صالحة"""
+
+
+class CircuitBreaker:
+    """قاطع دائرة لكل مصدر: يوقف الطلبات مؤقتاً بعد فشل متكرر"""
+
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+
+    def __init__(self, failure_threshold, reset_seconds, clock=None):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock or SYSTEM_CLOCK
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self):
+        """هل يُسمح بطلب الآن؟ بعد مهلة الفتح يُسمح بطلب تجريبي واحد"""
+        if self.state == self.OPEN:
+            if self.clock.time() - self.opened_at < self.reset_seconds:
+                return False
+            self.state = self.HALF_OPEN
+            return True
+        return self.state == self.CLOSED
+
+    def is_open(self):
+        """فحص دون تغيير الحالة"""
+        return self.state == self.OPEN and self.clock.time() - self.opened_at < self.reset_seconds
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = self.clock.time()
+
+
+class _InFlight:
+    """طلب جارٍ يشترك في نتيجته كل من يطلب نفس المفتاح"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResilientFetcher:
+    """طبقة جلب مشتركة: جلسات مجمعة، دمج الطلبات المتطابقة، تراجع أسي، قواطع دائرة وبيانات احتياطية"""
+
+    def __init__(self, config, clock=None):
+        self.config = config
+        self.clock = clock or SYSTEM_CLOCK
+        self._session = None
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.breakers = {}
+        self.last_good = {}  # key -> (fetched_at, value)
+        self.stats = {
+            'requests': 0,
+            'cache_hits': 0,
+            'coalesced': 0,
+            'retries': 0,
+            'failures': 0,
+            'stale_served': 0,
+            'stale_rejected': 0,
+            'circuit_rejections': 0
+        }
+
+    @property
+    def session(self):
+        """جلسة HTTP واحدة بمجمع اتصالات يعاد استخدامه"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=self.config.FETCH_POOL_SIZE,
+                pool_maxsize=self.config.FETCH_POOL_SIZE
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+        return self._session
+
+    def _breaker(self, endpoint):
+        if endpoint not in self.breakers:
+            self.breakers[endpoint] = CircuitBreaker(
+                self.config.CIRCUIT_FAILURE_THRESHOLD,
+                self.config.CIRCUIT_RESET_SECONDS,
+                self.clock
+            )
+        return self.breakers[endpoint]
+
+    def has(self, key):
+        return key in self.last_good
+
+    def prime(self, key, value, fetched_at):
+        """تعبئة آخر بيانات جيدة (مثلاً من الحالة الدافئة)"""
+        self.last_good[key] = (fetched_at, value)
+
+    def fetched_at(self, key):
+        entry = self.last_good.get(key)
+        return entry[0] if entry else None
+
+    def _call_with_retries(self, loader, breaker):
+        """محاولات متكررة بتراجع أسي عشوائي"""
+        attempts = self.config.FETCH_MAX_RETRIES + 1
+        for attempt in range(attempts):
+            if not breaker.allow():
+                self.stats['circuit_rejections'] += 1
+                raise FetchUnavailable("circuit open")
+
+            self.stats['requests'] += 1
+            try:
+                value = loader()
+                breaker.record_success()
+                return value
+            except Exception:
+                breaker.record_failure()
+                self.stats['failures'] += 1
+                if attempt == attempts - 1:
+                    raise
+
+            self.stats['retries'] += 1
+            delay = min(self.config.FETCH_BACKOFF_BASE * (2 ** attempt), self.config.FETCH_BACKOFF_MAX)
+            self.clock.sleep(delay * random.uniform(0.5, 1.5))
+
+    def _load(self, key, loader, endpoint):
+        """تحميل مع دمج الطلبات: طلب واحد فقط لكل مفتاح في نفس الوقت"""
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = self._call_with_retries(loader, self._breaker(endpoint))
+            self.last_good[key] = (self.clock.time(), call.value)
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+    def _revalidate_in_background(self, key, loader, endpoint):
+        def run():
+            try:
+                self._load(key, loader, endpoint)
+            except Exception as e:
+                print(f"⚠️  Background refresh of {key} failed: {e}")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def fetch(self, key, loader, endpoint, ttl=0, background=False, max_stale=None):
+        """جلب مع بيانات حديثة من الذاكرة، أو تحميل، أو آخر بيانات جيدة عند الفشل
+
+        max_stale: أقصى عمر بالثواني لآخر بيانات جيدة تُقدم بدلاً من الفشل
+        """
+        entry = self.last_good.get(key)
+        if entry and self.clock.time() - entry[0] < ttl:
+            self.stats['cache_hits'] += 1
+            return entry[1]
+
+        # stale-while-revalidate: تقديم القديم فوراً وتحديثه في الخلفية، ما لم يتجاوز max_stale
+        if entry and background and (max_stale is None or self.clock.time() - entry[0] <= max_stale):
+            if key not in self._inflight and not self._breaker(endpoint).is_open():
+                self._revalidate_in_background(key, loader, endpoint)
+            self.stats['stale_served'] += 1
+            return entry[1]
+
+        try:
+            return self._load(key, loader, endpoint)
+        except Exception as e:
+            if not entry:
+                raise FetchUnavailable(f"{endpoint}: {e}") from e
+
+            # آخر بيانات جيدة أقدم من الحد لا تُقدم كأنها حديثة
+            age = self.clock.time() - entry[0]
+            if max_stale is not None and age > max_stale:
+                self.stats['stale_rejected'] += 1
+                raise FetchUnavailable(f"{endpoint}: {e} (last good data {age:.0f}s old)") from e
+
+            self.stats['stale_served'] += 1
+            print(f"⚠️  {endpoint} unavailable ({e}), using last good data for {key} ({age:.0f}s old)")
+            return entry[1]
+
+    def get_json(self, url, endpoint=None, ttl=0, background=False, max_stale=None):
+        """طلب JSON عبر الجلسة المجمعة"""
+        def loader():
+            response = self.session.get(url, timeout=self.config.FETCH_TIMEOUT)
+            response.raise_for_status()
+            return response.json()
+
+        return self.fetch(url, loader, endpoint or urlparse(url).netloc, ttl, background, max_stale)
+
+    def breaker_states(self):
+        return {endpoint: breaker.state for endpoint, breaker in self.breakers.items()}
+
+
+if __name__ == "__main__":
+    # فحص ذاتي مقابل خادم محلي بديل: python fetch_layer.py
+    import json
+    import time
+    from datetime import datetime
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from clock import SimulatedClock
+    from hybrid_config import HybridConfig
+
+    class StubHandler(BaseHTTPRequestHandler):
+        hits = 0
+        failing = False
+
+        def do_GET(self):
+            StubHandler.hits += 1
+            time.sleep(0.2)  # نافذة تتزامن فيها الطلبات لاختبار الدمج
+            if StubHandler.failing:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            body = json.dumps({'hits': StubHandler.hits}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/calendar"
+
+    # ساعة محاكاة: التراجع الأسي وعمر البيانات بدون انتظار حقيقي
+    clock = SimulatedClock(datetime(2024, 1, 1, 12))
+    fetcher = ResilientFetcher(HybridConfig(), clock)
+    max_stale = 300
+    checks = []
+
+    threads = [threading.Thread(target=fetcher.get_json, args=(url,)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    checks.append(('concurrent requests coalesced', StubHandler.hits == 1))
+
+    StubHandler.failing = True
+    clock.advance(60)
+    checks.append(('last good data served during outage',
+                   fetcher.get_json(url, max_stale=max_stale) == {'hits': 1}))
+
+    clock.advance(2 * max_stale)
+    try:
+        fetcher.get_json(url, max_stale=max_stale)
+        checks.append(('data older than max_stale refused', False))
+    except FetchUnavailable:
+        checks.append(('data older than max_stale refused', True))
+
+    hits = StubHandler.hits
+    try:
+        fetcher.get_json(url)
+    except FetchUnavailable:
+        pass
+    checks.append(('circuit open stops requests',
+                   fetcher.breaker_states().get(urlparse(url).netloc) == CircuitBreaker.OPEN
+                   and StubHandler.hits == hits))
+
+    try:
+        fetcher.get_json(url, background=True, max_stale=max_stale)
+        checks.append(('over-age data not served in background mode', False))
+    except FetchUnavailable:
+        checks.append(('over-age data not served in background mode', True))
+
+    server.shutdown()
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+    print(f"📊 {fetcher.stats}")
+    raise SystemExit(0 if all(passed for _, passed in checks) else 1)
\ No newline at end of file
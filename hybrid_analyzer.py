@@ -1,10 +1,17 @@
+from clock import SYSTEM_CLOCK
+from signal_registry import SignalRegistry
+
 class HybridAnalyzer:
     """محلل هجين يجمع بين مميزات الاستراتيجيتين"""
     
-    def __init__(self, config):
+    def __init__(self, config, clock=None):
         self.config = config
+        self.clock = clock or SYSTEM_CLOCK
         self.confluence_score = 0
+        self.score_details = []
         self.signal_quality = 'LOW'
+        self.score_distribution = {}  # عدد التقييمات لكل قيمة نقاط
+        self.signal_registry = SignalRegistry(config)
     
     def calculate_hybrid_score(self, market_data):
         """حساب النقاط الهجين"""
@@ -38,6 +45,10 @@ class HybridAnalyzer:
             score += self.config.SCORING_SYSTEM['rsi_confirmation']
             score_details.append("RSI Confirmation")
         
+        self.score_distribution[score] = self.score_distribution.get(score, 0) + 1
+        self.confluence_score = score
+        self.score_details = score_details
+        
         # تحديد جودة الإشارة
         if score >= 8:
             self.signal_quality = 'HIGH'
@@ -48,7 +59,7 @@ class HybridAnalyzer:
         
         return score, score_details
     
-    def generate_hybrid_signal(self, market_data):
+    def generate_hybrid_signal(self, market_data, pair=None):
         """توليد إشارة هجينة"""
         score, details = self.calculate_hybrid_score(market_data)
         
@@ -58,6 +69,17 @@ class HybridAnalyzer:
         # تحديد اتجاه الصفقة
         direction = self._determine_direction(market_data)
         
+        # منع تكرار نفس الإعداد قبل حساب مستويات الدخول والمخاطرة
+        structure_level = None
+        if pair is not None:
+            structure_level = self._get_structure_level(market_data, direction)
+            now = self.clock.now()
+            is_new, reason = self.signal_registry.check(pair, direction, structure_level, now)
+            if not is_new:
+                print(f"🔁 Signal suppressed: {reason}")
+                return None
+            self.signal_registry.register(pair, direction, structure_level, now)
+        
         # حساب مستويات الدخول والخروج
         entry_levels = self._calculate_entry_levels(market_data, direction)
         risk_levels = self._calculate_risk_levels(entry_levels, direction)
@@ -71,9 +93,20 @@ class HybridAnalyzer:
             'sl_price': risk_levels['stop_loss'],
             'tp_price': risk_levels['take_profit'],
             'risk_multiplier': self._get_risk_multiplier(),
-            'timestamp': datetime.now()
+            'structure_level': structure_level,
+            'timestamp': self.clock.now()
         }
     
+    def _get_structure_level(self, market_data, direction):
+        """مستوى الهيكل الذي بُني عليه الإعداد: آخر قاع للشراء وآخر قمة للبيع"""
+        column = 'recent_swing_low' if direction in ('BUY', 'LONG') else 'recent_swing_high'
+        df = market_data['M5']
+        if column not in df.columns:
+            return None
+        
+        levels = df[column].dropna()
+        return levels.iloc[-1] if not levels.empty else None
+    
     def _get_risk_multiplier(self):
         """مضاعف المخاطرة بناء على جودة الإشارة"""
         multipliers = {
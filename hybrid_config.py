@@ -19,6 +19,12 @@ class HybridConfig:
         (10, 12)    # التداخل
     ]
     
+    # معاملات المؤشرات (مفتاح مشاركة الحسابات بين الاستراتيجيات)
+    EMA_PERIODS = [20, 50, 200]
+    RSI_PERIOD = 14
+    ATR_PERIOD = 14
+    SWING_WINDOW = 3
+    
     # نظام النقاط المتعدد
     SCORING_SYSTEM = {
         'kill_zone': 2,
@@ -33,4 +39,69 @@ class HybridConfig:
     
     MINIMUM_SCORE = 6
     MAX_DAILY_TRADES = 4
-    BASE_RISK = 0.005  # 0.5%
\ No newline at end of file
+    BASE_RISK = 0.005  # 0.5%
+    
+    # دورة الحلقة الرئيسية
+    CYCLE_SECONDS = 60
+    ERROR_BACKOFF_SECONDS = 120
+    
+    # التشغيل المجزأ (Sharded) عبر عدة عمليات
+    SHARD_COUNT = 2
+    SHARD_CYCLE_SECONDS = 60
+    SHARD_HEARTBEAT_TIMEOUT = 300  # ثوانٍ قبل اعتبار العامل معلقاً
+    SHARD_SIGNAL_MAX_AGE = 120     # تجاهل الإشارات الأقدم من ذلك (ثوانٍ)
+    
+    # الذاكرة المؤقتة وحالة الإقلاع السريع
+    DATA_CACHE_TTL = 60            # صلاحية البيانات الخام (ثوانٍ)
+    NEWS_CACHE_MINUTES = 30        # صلاحية التقويم الاقتصادي
+    WARM_STATE_PATH = '.cache/warm_state.pkl'  # الشموع المستعادة تتبع DATA_CACHE_TTL و FETCH_MAX_STALE_SECONDS
+    
+    # منع تكرار الإشارات
+    SIGNAL_COOLDOWN_MINUTES = 15       # تهدئة افتراضية لكل زوج بعد أي إشارة
+    SIGNAL_COOLDOWN_OVERRIDES = {}     # مثال: {'GBPUSD': 30}
+    SIGNAL_EXPIRY_MINUTES = 240        # مدة بقاء الإعداد في السجل
+    
+    # نموذج جودة الإشارة المتعلم (اختياري)
+    QUALITY_MODEL_PATH = 'models/signal_quality.npz'
+    QUALITY_MODEL_THRESHOLDS = {'HIGH': 0.60, 'MEDIUM': 0.50}
+    QUALITY_MODEL_BASELINE_PROBABILITY = 0.50  # احتمال يقابل المخاطرة الأساسية
+    QUALITY_MODEL_HOLDOUT_FRACTION = 0.25      # آخر الصفقات المحجوزة لتقييم النموذج
+    QUALITY_MODEL_LATENCY_BUDGET_MS = 5.0
+    QUALITY_MODEL_MAX_OVERRUNS = 3             # تجاوزات متتالية قبل التعطيل
+    
+    # مخزن خصائص التقييم لكل (زوج، شمعة)
+    FEATURE_STORE_ENABLED = True
+    FEATURE_STORE_PATH = 'data/features'
+    FEATURE_STORE_BATCH_SIZE = 500     # صفوف لكل مقطع على القرص
+    
+    # طبقة الجلب المرنة
+    NEWS_CALENDAR_URL = "https://nfs.faireconomy.media/ff_calendar_thisweek.json"
+    NEWS_CALENDAR_MAX_STALE_SECONDS = 6 * 3600  # تقويم أقدم يُعتبر غير متاح ويوقف التداول
+    FETCH_TIMEOUT = (3.05, 10)         # (اتصال، قراءة) بالثواني
+    FETCH_MAX_RETRIES = 2
+    FETCH_BACKOFF_BASE = 0.5           # ثوانٍ، تتضاعف مع كل محاولة
+    FETCH_BACKOFF_MAX = 8
+    FETCH_POOL_SIZE = 10
+    CIRCUIT_FAILURE_THRESHOLD = 5      # إخفاقات متتالية قبل فتح القاطع
+    CIRCUIT_RESET_SECONDS = 60
+    FETCH_MAX_STALE_SECONDS = 300      # أقصى عمر لآخر شموع صالحة تُقدم عند تعطل المصدر
+    
+    # إدارة المراكز بعد الدخول
+    POSITION_MANAGEMENT_ENABLED = True
+    BREAK_EVEN_TRIGGER_R = 1.0         # نقل الوقف للتعادل بعد 1R ربح
+    BREAK_EVEN_OFFSET_PIPS = 0.5       # فوق الدخول لتغطية العمولة
+    TRAILING_ACTIVATION_R = 1.5
+    TRAILING_ATR_MULTIPLIER = 1.5      # مسافة الوقف المتحرك بالـ ATR (M5)
+    PARTIAL_TP_LEVELS = [(1.0, 0.5)]   # (مستوى R، نسبة الحجم الأصلي)
+    
+    # التحقق من بيانات السوق
+    FX_WEEK_CLOSE = (4, 22)            # (يوم الأسبوع، ساعة UTC): الجمعة 22:00
+    FX_WEEK_OPEN = (6, 21)             # الأحد 21:00
+    DATA_MAX_FILL_BARS = 3             # أقصى فجوة تُسد بشموع مسطحة
+    
+    # تحليل مونت كارلو
+    MONTE_CARLO_PATHS = 20000
+    MONTE_CARLO_CHUNK_SIZE = 2000      # مسارات لكل دفعة لتحديد الذاكرة
+    MONTE_CARLO_BLOCK_SIZE = 5         # طول الكتلة في إعادة العينة بالكتل
+    MONTE_CARLO_RUIN_THRESHOLD = 0.30  # خسارة 30% من رأس المال تعتبر إفلاساً
+    MONTE_CARLO_PERCENTILES = [5, 25, 50, 75, 95]
\ No newline at end of file
@@ -1,16 +1,19 @@
-from datetime import datetime, time
-import requests
+from datetime import datetime, timezone
+from clock import SYSTEM_CLOCK
+from fetch_layer import FetchUnavailable, ResilientFetcher
 
 class KillZoneManager:
-    def __init__(self, config):
+    def __init__(self, config, clock=None, fetcher=None):
         self.config = config
+        self.clock = clock or SYSTEM_CLOCK
+        self.fetcher = fetcher or ResilientFetcher(config, self.clock)
         self.news_cache = {}
         self.last_news_check = None
     
     def is_kill_zone(self):
         """فحص إذا كان الوقت ضمن Kill Zones"""
-        current_hour = datetime.utcnow().hour
-        current_minute = datetime.utcnow().minute
+        current_hour = self.clock.utcnow().hour
+        current_minute = self.clock.utcnow().minute
         current_time = current_hour + current_minute/60
         
         for start, end in self.config.KILL_ZONES:
@@ -20,8 +23,8 @@ class KillZoneManager:
     
     def get_active_kill_zone(self):
         """الحصول على Kill Zone النشط"""
-        current_hour = datetime.utcnow().hour
-        current_minute = datetime.utcnow().minute
+        current_hour = self.clock.utcnow().hour
+        current_minute = self.clock.utcnow().minute
         current_time = current_hour + current_minute/60
         
         zones = {
@@ -36,20 +39,19 @@ class KillZoneManager:
         return None
     
     def check_high_impact_news(self, currencies=['USD', 'EUR', 'GBP']):
-        """فحص الأخبار عالية التأثير"""
+        """فحص الأخبار عالية التأثير؛ None إذا لم يتوفر تقويم حديث"""
         try:
-            # استخدام التقنية السابقة مع تحسينات
-            url = "https://nfs.faireconomy.media/ff_calendar_thisweek.json"
-            response = requests.get(url, timeout=10)
+            events = self._get_calendar_events()
             
-            if response.status_code == 200:
-                events = response.json()
-                current_time = datetime.utcnow()
+            if events is not None:
+                current_time = self.clock.utcnow()
                 
                 high_impact = []
                 for event in events:
                     if event.get('impact') == 'High':
                         event_time = datetime.fromisoformat(event['date'].replace('Z', '+00:00'))
+                        # مقارنة بتوقيت UTC بدون منطقة زمنية مثل الساعة
+                        event_time = event_time.astimezone(timezone.utc).replace(tzinfo=None)
                         time_diff = (event_time - current_time).total_seconds() / 3600
                         
                         # حدث خلال الساعتين القادمتين أو حدث قبل ساعة
@@ -63,14 +65,39 @@ class KillZoneManager:
                 
                 return high_impact
                 
+        except FetchUnavailable as e:
+            # بلا تقويم حديث لا يمكن ضمان غياب الأخبار
+            print(f"⚠️  News calendar unavailable: {e}")
+            return None
         except Exception as e:
             print(f"Error checking news: {e}")
         
         return []
     
+    def _get_calendar_events(self):
+        """جلب التقويم الاقتصادي عبر طبقة الجلب المشتركة"""
+        url = self.config.NEWS_CALENDAR_URL
+        
+        # التقويم المستعاد من الحالة الدافئة يصبح آخر بيانات جيدة
+        if self.news_cache.get('events') is not None and self.last_news_check and not self.fetcher.has(url):
+            fetched_at = self.last_news_check.replace(tzinfo=timezone.utc).timestamp()
+            self.fetcher.prime(url, self.news_cache['events'], fetched_at)
+        
+        # القديم يُقدم فوراً ويُحدّث في الخلفية حتى لا تتوقف الحلقة على مصدر بطيء
+        events = self.fetcher.get_json(
+            url, endpoint='calendar',
+            ttl=self.config.NEWS_CACHE_MINUTES * 60,
+            background=True,
+            max_stale=self.config.NEWS_CALENDAR_MAX_STALE_SECONDS
+        )
+        
+        self.news_cache['events'] = events
+        self.last_news_check = datetime.fromtimestamp(self.fetcher.fetched_at(url), timezone.utc).replace(tzinfo=None)
+        return events
+    
     def get_market_session(self):
         """تحديد جلسة السوق الحالية"""
-        current_hour = datetime.utcnow().hour
+        current_hour = self.clock.utcnow().hour
         
         if 0 <= current_hour < 5:
             return "ASIA"
@@ -97,6 +124,8 @@ class KillZoneManager:
         relevant_currencies = [base_currency, quote_currency]
         
         high_impact_news = self.check_high_impact_news(relevant_currencies)
+        if high_impact_news is None:
+            return False, "News calendar unavailable"
         if high_impact_news:
             news_titles = [news['title'] for news in high_impact_news[:2]]
             return False, f"High impact news: {news_titles}"
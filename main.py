@@ -1,6 +1,4 @@
-import time
-import pandas as pd
-from datetime import datetime
+from clock import SYSTEM_CLOCK
 from hybrid_config import HybridConfig
 from hybrid_analyzer import HybridAnalyzer
 from adaptive_risk_manager import AdaptiveRiskManager
@@ -8,68 +6,167 @@ from kill_zone_manager import KillZoneManager
 from data_aggregator import DataAggregator
 from performance_tracker import PerformanceTracker
 from execution_handler import ExecutionHandler
+from signal_quality_model import SignalQualityModel
+from feature_store import FeatureStore
+from fetch_layer import ResilientFetcher
+from position_manager import PositionManager
 
 class HybridConfluenceScalper:
     """الاستراتيجية الهجينة الرئيسية المكتملة"""
     
-    def __init__(self, live_trading=False, initial_capital=10000):
-        self.config = HybridConfig()
-        self.data_aggregator = DataAggregator(self.config)
-        self.kill_zone_manager = KillZoneManager(self.config)
-        self.analyzer = HybridAnalyzer(self.config)
+    def __init__(self, live_trading=False, initial_capital=10000, clock=None,
+                 config=None, data_aggregator=None, fetcher=None):
+        self.config = config or HybridConfig()
+        self.clock = clock or SYSTEM_CLOCK
+        # طبقة جلب واحدة مشتركة بين البيانات والتقويم (ومع باقي النسخ في وضع المضيف)
+        self.fetcher = fetcher or ResilientFetcher(self.config, self.clock)
+        self.data_aggregator = data_aggregator or DataAggregator(self.config, self.clock, self.fetcher)
+        self.kill_zone_manager = KillZoneManager(self.config, self.clock, self.fetcher)
+        self.analyzer = HybridAnalyzer(self.config, self.clock)
         self.risk_manager = AdaptiveRiskManager(self.config, initial_capital)
-        self.performance_tracker = PerformanceTracker()
-        self.execution_handler = ExecutionHandler(live_trading)
+        self.performance_tracker = PerformanceTracker(initial_capital, self.clock)
+        self.position_manager = PositionManager(self.config, self.clock) if self.config.POSITION_MANAGEMENT_ENABLED else None
+        self.execution_handler = ExecutionHandler(live_trading, clock=self.clock, position_manager=self.position_manager)
         self.live_trading = live_trading
+        self.quality_model = SignalQualityModel(self.config)
+        self.feature_store = FeatureStore(self.config, clock=self.clock) if self.config.FEATURE_STORE_ENABLED else None
+        self.warm_state = None
+        self.dashboard = None
+        self.last_bar_times = {}  # زوج -> آخر شمعة M1 مغلقة طُبقت على المراكز
         
         print("🚀 Hybrid Confluence Scalper Initialized Successfully!")
         print(f"📊 Initial Capital: ${initial_capital:,.2f}")
         print(f"🎯 Trading Mode: {'LIVE' if live_trading else 'SIMULATION'}")
+        
+        if self.quality_model.load():
+            print(f"🧠 Signal quality model loaded from {self.config.QUALITY_MODEL_PATH}")
     
-    def run_strategy(self):
-        """تشغيل الاستراتيجية الهجينة بشكل مستمر"""
+    def run_strategy(self, max_iterations=None, should_stop=None):
+        """تشغيل الاستراتيجية الهجينة بشكل مستمر حتى العدد الأقصى أو تحقق شرط الإيقاف"""
         print("\n" + "="*60)
         print("STARTING HYBRID CONFLUENCE SCALPER STRATEGY")
         print("="*60)
         
         iteration = 0
-        while True:
+        while max_iterations is None or iteration < max_iterations:
+            if should_stop and should_stop():
+                break
             try:
                 iteration += 1
-                print(f"\n📈 Iteration {iteration} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                
-                # تحديث ظروف السوق
-                self._update_market_conditions()
-                
-                # معالجة كل زوج
-                for pair in self.config.PAIRS:
-                    self.process_hybrid_pair(pair)
-                
-                # مراقبة الصفقات النشطة
-                completed_trades = self.execution_handler.monitor_trades()
-                for trade in completed_trades:
-                    self.performance_tracker.update_trade_result(
-                        trade['order_id'], 
-                        trade.get('exit_price', trade['executed_price']),
-                        trade.get('exit_time', datetime.now())
-                    )
-                
-                # عرض تقرير كل 10 iterations
-                if iteration % 10 == 0:
-                    print("\n" + "="*40)
-                    print("PERFORMANCE UPDATE")
-                    print("="*40)
-                    print(self.performance_tracker.generate_report('ALL'))
+                self.run_cycle(iteration)
                 
                 # انتظار للدورة التالية (1 دقيقة)
-                time.sleep(60)
+                self.clock.sleep(self.config.CYCLE_SECONDS)
                 
             except KeyboardInterrupt:
                 print("\n🛑 Strategy stopped by user")
                 break
             except Exception as e:
                 print(f"❌ Error in main loop: {e}")
-                time.sleep(120)  # انتظار أطول في حالة الخطأ
+                self.clock.sleep(self.config.ERROR_BACKOFF_SECONDS)  # انتظار أطول في حالة الخطأ
+        
+        if self.feature_store:
+            self.feature_store.flush()
+        return iteration
+    
+    def run_cycle(self, iteration):
+        """تنفيذ دورة تحليل وتداول واحدة"""
+        print(f"\n📈 Iteration {iteration} - {self.clock.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        # تحديث ظروف السوق
+        self._update_market_conditions()
+        
+        # تحليل كل الأزواج ثم تقييم الإشارات المرشحة دفعة واحدة
+        candidates = []
+        for pair in self.config.PAIRS:
+            signal = self.analyze_pair(pair)
+            if signal:
+                candidates.append((pair, signal))
+        
+        self.quality_model.apply([signal for _, signal in candidates])
+        for pair, signal in candidates:
+            self.handle_hybrid_signal(pair, signal)
+        
+        # مراقبة الصفقات النشطة
+        self._monitor_active_trades()
+        
+        # عرض تقرير كل 10 iterations
+        if iteration % 10 == 0:
+            print("\n" + "="*40)
+            print("PERFORMANCE UPDATE")
+            print("="*40)
+            print(self.performance_tracker.generate_report('ALL'))
+            
+            if self.dashboard:
+                redrawn = self.dashboard.render(self.performance_tracker, self.analyzer)
+                print(f"📊 Dashboard updated ({len(redrawn)} panels redrawn)")
+        
+        # حفظ الحالة الدافئة لإعادة تشغيل سريعة
+        if self.warm_state:
+            self.warm_state.save(self)
+    
+    def _monitor_active_trades(self):
+        """مراقبة الصفقات النشطة وتسجيل المغلقة منها"""
+        price_updates = self._closed_bars() if self.position_manager else None
+        completed_trades = self.execution_handler.monitor_trades(price_updates)
+        
+        if self.position_manager:
+            for event in self.position_manager.drain_events():
+                self.performance_tracker.record_management_event(event)
+        
+        for trade in completed_trades:
+            self.performance_tracker.update_trade_result(
+                trade['order_id'], 
+                trade.get('exit_price', trade['executed_price']),
+                trade.get('exit_time', self.clock.now()),
+                trade.get('exits')
+            )
+        return completed_trades
+    
+    def _closed_bars(self):
+        """شموع M1 المغلقة منذ آخر دورة و ATR الـ M5 لكل زوج فيه مراكز مفتوحة"""
+        import pandas as pd
+        
+        open_pairs = self.position_manager.open_pairs()
+        self.last_bar_times = {pair: bar_time for pair, bar_time in self.last_bar_times.items() if pair in open_pairs}
+        
+        # آخر شمعة في الوضع الحي ما زالت تتشكل: تُطبق عند إغلاقها فقط
+        cutoff = pd.Timestamp(self.clock.utcnow()) - pd.Timedelta(minutes=1)
+        
+        bars = {}
+        for pair in open_pairs:
+            try:
+                # نفس فترة التحليل حتى تُقرأ البيانات من الذاكرة المؤقتة
+                market_data = self.data_aggregator.get_multi_timeframe_data(pair, '3d')
+                if 'M1' not in market_data or 'M5' not in market_data:
+                    continue
+                if self.data_aggregator.is_stale(pair):
+                    print(f"⏸️  Not managing {pair} positions on stale prices")
+                    continue
+                
+                m1 = market_data['M1']
+                as_index_time = (lambda t: t.tz_localize('UTC')) if m1.index.tz is not None else (lambda t: t)
+                closed = m1.index <= as_index_time(cutoff)
+                
+                # كل الشموع المغلقة منذ آخر دورة (أو منذ أقدم دخول) حتى لا يفوت لمس وقف أو هدف بين الدورات
+                last_bar_time = self.last_bar_times.get(pair)
+                if last_bar_time is not None:
+                    closed &= m1.index > last_bar_time
+                else:
+                    closed &= m1.index >= as_index_time(pd.Timestamp(self.position_manager.first_opened_at(pair)))
+                new_bars = m1[closed]
+                if new_bars.empty:
+                    continue
+                
+                atr = market_data['M5']['ATR'].iloc[-1]
+                bars[pair] = [
+                    {'bar_time': bar_time, 'high': high, 'low': low, 'atr': atr}
+                    for bar_time, high, low in zip(new_bars.index, new_bars['High'].to_numpy(), new_bars['Low'].to_numpy())
+                ]
+                self.last_bar_times[pair] = new_bars.index[-1]
+            except Exception as e:
+                print(f"❌ Error reading prices for {pair}: {e}")
+        return bars
     
     def _update_market_conditions(self):
         """تحديث ظروف السوق للجميع"""
@@ -96,6 +193,14 @@ class HybridConfluenceScalper:
     
     def process_hybrid_pair(self, pair):
         """معالجة زوج باستخدام المنهجية الهجينة"""
+        signal = self.analyze_pair(pair)
+        
+        if signal:
+            self.quality_model.apply([signal])
+            self.handle_hybrid_signal(pair, signal)
+    
+    def analyze_pair(self, pair):
+        """تحليل زوج وإرجاع الإشارة المرشحة إن وجدت"""
         try:
             print(f"🔍 Analyzing {pair}...")
             
@@ -104,34 +209,62 @@ class HybridConfluenceScalper:
             
             if not market_data:
                 print(f"❌ No data for {pair}")
-                return
+                return None
+            
+            # لا دخول على أسعار قديمة أثناء تعطل مصدر البيانات
+            if self.data_aggregator.is_stale(pair):
+                print(f"⏸️  Skipping {pair}: market data is stale (source unavailable)")
+                return None
             
             # توليد الإشارة الهجينة
-            signal = self.analyzer.generate_hybrid_signal(market_data)
+            signal = self.analyzer.generate_hybrid_signal(market_data, pair)
+            
+            # حفظ خصائص التقييم للبحث وإعادة التشغيل
+            if self.feature_store:
+                self._record_features(pair, market_data)
             
             if signal:
                 print(f"🎯 Signal generated for {pair}: {signal['direction']} (Score: {signal['score']}/10, Quality: {signal['quality']})")
-                
-                # حساب حجم المركز الديناميكي
-                position_size = self.risk_manager.calculate_dynamic_position_size(
-                    signal['quality'], signal['entry_price'], signal['sl_price']
-                )
-                
-                signal['position_size'] = position_size
-                signal['pair'] = pair
-                
-                # التحقق النهائي من إدارة المخاطر
-                can_trade, reason = self.risk_manager.can_trade(signal['quality'])
-                
-                if can_trade:
-                    self.execute_hybrid_trade(signal)
-                else:
-                    print(f"🚫 Trade rejected for {pair}: {reason}")
             else:
                 print(f"➖ No valid signal for {pair}")
+            
+            return signal
                 
         except Exception as e:
             print(f"❌ Error processing {pair}: {e}")
+            return None
+    
+    def _record_features(self, pair, market_data):
+        """تسجيل خصائص التقييم دون أن يُسقط فشلها إشارة صالحة"""
+        try:
+            self.feature_store.record_evaluation(
+                pair, market_data, self.analyzer, self.data_aggregator,
+                self.kill_zone_manager.get_active_kill_zone()
+            )
+        except Exception as e:
+            print(f"⚠️  Feature store skipped {pair}: {e}")
+    
+    def handle_hybrid_signal(self, pair, signal):
+        """تحجيم الإشارة والتحقق من المخاطر ثم تنفيذها"""
+        # حساب حجم المركز الديناميكي
+        position_size = self.risk_manager.calculate_dynamic_position_size(
+            signal['quality'], signal['entry_price'], signal['sl_price'],
+            signal.get('win_probability')
+        )
+        
+        signal['position_size'] = position_size
+        signal['pair'] = pair
+        signal.setdefault('kill_zone', self.kill_zone_manager.get_active_kill_zone())
+        
+        # التحقق النهائي من إدارة المخاطر
+        can_trade, reason = self.risk_manager.can_trade(signal['quality'])
+        
+        if can_trade:
+            self.execute_hybrid_trade(signal)
+            return True
+        
+        print(f"🚫 Trade rejected for {pair}: {reason}")
+        return False
     
     def execute_hybrid_trade(self, signal):
         """تنفيذ الصفقة الهجينة"""
@@ -182,8 +315,30 @@ class HybridConfluenceScalper:
         if metrics:
             print(f"\n📈 Additional Metrics:")
             print(f"   Best Quality: {max(metrics['quality_analysis'].items(), key=lambda x: x[1]['win_rate'])[0] if metrics['quality_analysis'] else 'N/A'}")
-            print(f"   Avg Trade Duration: N/A")  # يمكن إضافته مع توقيت الخروج
+            rolling = self.performance_tracker.analytics.query('ALL')
+            avg_duration = f"{rolling['avg_duration_minutes']:.1f} min" if rolling else 'N/A'
+            print(f"   Avg Trade Duration: {avg_duration}")
             print(f"   Risk-Adjusted Return: {metrics['total_pnl'] / max(metrics['max_drawdown'], 1):.2f}")
+        
+        registry_stats = self.analyzer.signal_registry.get_stats()
+        print(f"\n🔁 Signal Registry: {registry_stats['checks']} checks, "
+              f"{registry_stats['cooldown_hits']} cooldown hits, "
+              f"{registry_stats['duplicate_hits']} duplicate hits "
+              f"({registry_stats['hit_rate']:.1%} suppressed)")
+        
+        fetch_stats = self.fetcher.stats
+        print(f"🌐 Fetch Layer: {fetch_stats['requests']} requests, "
+              f"{fetch_stats['coalesced']} coalesced, {fetch_stats['retries']} retries, "
+              f"{fetch_stats['stale_served']} stale fallbacks, "
+              f"{fetch_stats['stale_rejected']} too old, "
+              f"{fetch_stats['circuit_rejections']} circuit rejections")
+        open_circuits = [endpoint for endpoint, state in self.fetcher.breaker_states().items() if state != 'CLOSED']
+        if open_circuits:
+            print(f"   Open Circuits: {', '.join(open_circuits)}")
+        quality = self.data_aggregator.validator.totals()
+        print(f"🧹 Data Quality: {quality['batches']} batches, {quality['duplicates']} duplicates, "
+              f"{quality['weekend']} weekend prints, {quality['ohlc_repaired'] + quality['bad_prices']} repaired, "
+              f"{quality['zero_range']} zero-range, {quality['gaps']} gaps ({quality['filled_bars']} bars filled)")
 
 if __name__ == "__main__":
     # Initialize strategy
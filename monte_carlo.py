@@ -0,0 +1,156 @@
+import numpy as np
+from adaptive_risk_manager import AdaptiveRiskManager
+
+
+def _sample_indices(rng, trade_count, paths, path_length, method, block_size):
+    """فهارس الصفقات لكل مسار حسب طريقة إعادة العينة"""
+    if method == 'shuffle':
+        # إعادة ترتيب نفس الصفقات: نفس العائد النهائي بانخفاضات مختلفة
+        return np.argsort(rng.random((paths, trade_count)), axis=1)
+
+    if method == 'block':
+        # كتل متتالية دائرية للحفاظ على سلاسل الربح والخسارة
+        blocks = -(-path_length // block_size)
+        starts = rng.integers(0, trade_count, size=(paths, blocks))
+        indices = (starts[:, :, None] + np.arange(block_size)) % trade_count
+        return indices.reshape(paths, -1)[:, :path_length]
+
+    return rng.integers(0, trade_count, size=(paths, path_length))
+
+
+def _simulate_chunk(returns, paths, path_length, method, block_size, ruin_threshold, seed):
+    """محاكاة دفعة من المسارات: أقصى انخفاض، العائد النهائي والإفلاس لكل مسار"""
+    rng = np.random.default_rng(seed)
+    indices = _sample_indices(rng, len(returns), paths, path_length, method, block_size)
+
+    # رأس المال مركب في الفضاء اللوغاريتمي لتفادي الضرب المتكرر
+    growth = np.log1p(np.maximum(returns[indices], -0.999999))
+    log_equity = np.cumsum(growth, axis=1)
+    log_peak = np.maximum(np.maximum.accumulate(log_equity, axis=1), 0.0)
+
+    max_drawdown = 1 - np.exp((log_equity - log_peak).min(axis=1))
+    final_return = np.expm1(log_equity[:, -1])
+    ruined = log_equity.min(axis=1) <= np.log1p(-ruin_threshold)
+    return max_drawdown, final_return, ruined
+
+
+class MonteCarloAnalyzer:
+    """تحليل متانة الاستراتيجية بإعادة عينات تسلسل الصفقات المغلقة"""
+
+    METHODS = ['bootstrap', 'block', 'shuffle']
+
+    def __init__(self, config, initial_capital=10000):
+        self.config = config
+        self.initial_capital = initial_capital
+
+    @staticmethod
+    def trade_r_multiples(trades):
+        """مضاعف R والجودة لكل صفقة مغلقة"""
+        r_multiples, qualities = [], []
+        for trade in trades:
+            if trade.get('result') is None:
+                continue
+            risk_pips = abs(trade['entry_price'] - trade['sl_price']) / 0.0001
+            if risk_pips <= 0:
+                continue
+            r_multiples.append(trade['pnl_pips'] / risk_pips)
+            qualities.append(trade['quality'])
+        return np.array(r_multiples, dtype=np.float64), qualities
+
+    def trade_returns(self, trades, base_risk=None):
+        """عائد كل صفقة كنسبة من رأس المال بالمخاطرة الحالية ومضاعفات الجودة"""
+        base_risk = base_risk if base_risk is not None else self.config.BASE_RISK
+        r_multiples, qualities = self.trade_r_multiples(trades)
+        risk = np.array([base_risk * AdaptiveRiskManager.QUALITY_ADJUSTMENT.get(quality, 1.0)
+                         for quality in qualities], dtype=np.float64)
+        return r_multiples * risk
+
+    def run(self, trades, paths=None, path_length=None, method='bootstrap', block_size=None,
+            workers=1, seed=None, base_risk=None):
+        """تشغيل المحاكاة على دفعات محدودة الذاكرة، بالتوازي عبر العمليات عند الطلب"""
+        if method not in self.METHODS:
+            raise ValueError(f"unknown method {method}, expected one of {self.METHODS}")
+
+        returns = self.trade_returns(trades, base_risk)
+        if len(returns) < 2:
+            raise ValueError("at least 2 closed trades are needed")
+
+        paths = paths or self.config.MONTE_CARLO_PATHS
+        path_length = len(returns) if method == 'shuffle' else path_length or len(returns)
+        block_size = min(block_size or self.config.MONTE_CARLO_BLOCK_SIZE, len(returns))
+        ruin_threshold = self.config.MONTE_CARLO_RUIN_THRESHOLD
+
+        # بذور مستقلة لكل دفعة: النتائج لا تتغير بعدد العمليات
+        chunk_size = self.config.MONTE_CARLO_CHUNK_SIZE
+        sizes = [min(chunk_size, paths - start) for start in range(0, paths, chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        jobs = [(returns, size, path_length, method, block_size, ruin_threshold, chunk_seed)
+                for size, chunk_seed in zip(sizes, seeds)]
+
+        if workers and workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_simulate_chunk, *zip(*jobs)))
+        else:
+            results = [_simulate_chunk(*job) for job in jobs]
+
+        max_drawdown = np.concatenate([result[0] for result in results])
+        final_return = np.concatenate([result[1] for result in results])
+        ruined = np.concatenate([result[2] for result in results])
+
+        percentiles = self.config.MONTE_CARLO_PERCENTILES
+        return {
+            'method': method,
+            'paths': paths,
+            'trades_per_path': path_length,
+            'trade_count': len(returns),
+            'base_risk': base_risk if base_risk is not None else self.config.BASE_RISK,
+            'ruin_threshold': ruin_threshold,
+            'ruin_probability': float(ruined.mean()),
+            'mean_return': float(final_return.mean()),
+            'loss_probability': float((final_return < 0).mean()),
+            'drawdown_percentiles': dict(zip(percentiles, np.percentile(max_drawdown, percentiles))),
+            'return_percentiles': dict(zip(percentiles, np.percentile(final_return, percentiles))),
+            'historical': self._historical_path(returns)
+        }
+
+    @staticmethod
+    def _historical_path(returns):
+        """المسار الفعلي للمقارنة مع التوزيع"""
+        equity = np.cumprod(1 + returns)
+        peak = np.maximum(np.maximum.accumulate(equity), 1.0)
+        return {
+            'max_drawdown': float((1 - equity / peak).max()),
+            'final_return': float(equity[-1] - 1)
+        }
+
+    def generate_report(self, results):
+        """تقرير نصي بنفس أسلوب تقرير الأداء"""
+        capital = self.initial_capital
+        report = [
+            "=" * 60,
+            "MONTE CARLO ROBUSTNESS ANALYSIS",
+            "=" * 60,
+            f"Method: {results['method']} ({results['paths']:,} paths x {results['trades_per_path']} trades "
+            f"from {results['trade_count']} closed trades)",
+            f"Base Risk: {results['base_risk']:.2%} (quality multipliers "
+            f"{', '.join(f'{q} x{m}' for q, m in AdaptiveRiskManager.QUALITY_ADJUSTMENT.items())})",
+            f"Historical Path: {results['historical']['final_return']:.2%} return, "
+            f"{results['historical']['max_drawdown']:.2%} max drawdown",
+            "",
+            f"Ruin Probability (-{results['ruin_threshold']:.0%}): {results['ruin_probability']:.2%}",
+            f"Loss Probability: {results['loss_probability']:.2%}",
+            f"Mean Return: {results['mean_return']:.2%}",
+            "",
+            "PERCENTILES:        Max Drawdown      Return"
+        ]
+
+        for percentile in results['drawdown_percentiles']:
+            drawdown = results['drawdown_percentiles'][percentile]
+            final_return = results['return_percentiles'][percentile]
+            report.append(f"  P{percentile:<3}          {drawdown:>8.2%}      "
+                          f"{final_return:>8.2%} (${final_return * capital:>10,.2f})")
+
+        report.append("=" * 60)
+        return "\n".join(report)
\ No newline at end of file
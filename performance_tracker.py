@@ -1,12 +1,17 @@
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+import os
+import pickle
+from datetime import timedelta
+from clock import SYSTEM_CLOCK
+from streaming_analytics import StreamingAnalytics
 
 class PerformanceTracker:
     """تتبع وتحليل أداء التداول"""
     
-    def __init__(self):
+    def __init__(self, initial_capital=10000, clock=None):
         self.trades = []
+        self.clock = clock or SYSTEM_CLOCK
+        self.initial_capital = initial_capital
+        self.analytics = StreamingAnalytics(initial_capital)
         self.daily_stats = {
             'date': None,
             'trades_count': 0,
@@ -28,47 +33,90 @@ class PerformanceTracker:
             'position_size': trade_info['position_size'],
             'quality': trade_info['quality'],
             'score': trade_info['score'],
+            'kill_zone': trade_info.get('kill_zone'),
+            'details': trade_info.get('details', []),
+            'order_id': trade_info.get('order_id'),
             'timestamp': trade_info['timestamp'],
             'exit_price': None,
             'exit_time': None,
             'pnl': None,
             'pnl_pips': None,
             'result': None,  # WIN/LOSS
-            'rr_ratio': None
+            'rr_ratio': None,
+            'management': [],      # تعديلات الوقف والخروج الجزئي
+            'pnl_by_rule': None    # قاعدة الخروج -> P&L
         }
         self.trades.append(trade_record)
         return trade_record['id']
     
-    def update_trade_result(self, trade_id, exit_price, exit_time):
+    def _find_trade(self, trade_id):
+        """البحث برقم السجل أو برقم أمر التنفيذ"""
+        for trade in self.trades:
+            if trade_id in (trade['id'], trade.get('order_id')):
+                return trade
+        return None
+    
+    def record_management_event(self, event):
+        """تسجيل تعديل من مدير المراكز على صفقته"""
+        trade = self._find_trade(event['order_id'])
+        if trade is not None:
+            trade.setdefault('management', []).append(event)
+    
+    def update_trade_result(self, trade_id, exit_price, exit_time, exits=None):
         """تحديث نتيجة الصفقة"""
+        trade = self._find_trade(trade_id)
+        if trade is not None:
+            trade['exit_price'] = exit_price
+            trade['exit_time'] = exit_time
+            
+            # exits: أجزاء الخروج من مدير المراكز، وإلا خروج واحد بكامل الحجم
+            if not exits:
+                exits = [{'rule': 'EXIT', 'price': exit_price, 'size': trade['position_size']}]
+            
+            # حساب P&L لكل جزء ونسبته للقاعدة التي أغلقه
+            direction = 1 if trade['direction'] in ('BUY', 'LONG') else -1
+            pnl_by_rule = {}
+            for leg in exits:
+                leg_pnl = direction * (leg['price'] - trade['entry_price']) / 0.0001 * leg['size'] * 10  # $10 per pip
+                pnl_by_rule[leg['rule']] = pnl_by_rule.get(leg['rule'], 0) + leg_pnl
+            
+            trade['pnl_by_rule'] = pnl_by_rule
+            trade['pnl'] = sum(pnl_by_rule.values())
+            trade['pnl_pips'] = trade['pnl'] / (trade['position_size'] * 10) if trade['position_size'] else 0
+            
+            # تحديد النتيجة
+            trade['result'] = 'WIN' if trade['pnl'] > 0 else 'LOSS'
+            
+            # حساب نسبة R:R
+            risk_pips = abs(trade['entry_price'] - trade['sl_price']) / 0.0001
+            reward_pips = abs(trade['entry_price'] - trade['tp_price']) / 0.0001
+            trade['rr_ratio'] = reward_pips / risk_pips if risk_pips > 0 else 0
+            
+            # تحديث التحليلات التدفقية مع كل صفقة مغلقة
+            self.analytics.update(trade)
+    
+    def rule_attribution(self):
+        """P&L وعدد الخروجات والتعديلات لكل قاعدة إدارة"""
+        attribution = {}
         for trade in self.trades:
-            if trade['id'] == trade_id:
-                trade['exit_price'] = exit_price
-                trade['exit_time'] = exit_time
-                
-                # حساب P&L
-                if trade['direction'] == 'LONG':
-                    pnl_pips = (exit_price - trade['entry_price']) / 0.0001
-                else:
-                    pnl_pips = (trade['entry_price'] - exit_price) / 0.0001
-                
-                trade['pnl_pips'] = pnl_pips
-                trade['pnl'] = pnl_pips * trade['position_size'] * 10  # $10 per pip
-                
-                # تحديد النتيجة
-                trade['result'] = 'WIN' if trade['pnl'] > 0 else 'LOSS'
-                
-                # حساب نسبة R:R
-                risk_pips = abs(trade['entry_price'] - trade['sl_price']) / 0.0001
-                reward_pips = abs(trade['entry_price'] - trade['tp_price']) / 0.0001
-                trade['rr_ratio'] = reward_pips / risk_pips if risk_pips > 0 else 0
-                break
+            for rule, pnl in (trade.get('pnl_by_rule') or {}).items():
+                stats = attribution.setdefault(rule, {'pnl': 0, 'exits': 0, 'modifications': 0})
+                stats['pnl'] += pnl
+                stats['exits'] += 1
+            for event in trade.get('management', []):
+                if event['rule'] != 'PARTIAL_TP':
+                    stats = attribution.setdefault(event['rule'], {'pnl': 0, 'exits': 0, 'modifications': 0})
+                    stats['modifications'] += 1
+        return attribution
     
     def calculate_performance_metrics(self, period='ALL'):
         """حساب مقاييس الأداء"""
         if not self.trades:
             return {}
         
+        # استيراد متأخر: pandas لا يلزم إلا عند حساب المقاييس
+        import pandas as pd
+        
         df_trades = pd.DataFrame(self.trades)
         df_trades = df_trades[df_trades['result'].notna()]
         
@@ -78,9 +126,9 @@ class PerformanceTracker:
         # الفلترة حسب الفترة
         if period != 'ALL':
             if period == 'WEEK':
-                cutoff_date = datetime.now() - timedelta(days=7)
+                cutoff_date = self.clock.now() - timedelta(days=7)
             elif period == 'MONTH':
-                cutoff_date = datetime.now() - timedelta(days=30)
+                cutoff_date = self.clock.now() - timedelta(days=30)
             df_trades = df_trades[df_trades['timestamp'] >= cutoff_date]
         
         winning_trades = df_trades[df_trades['result'] == 'WIN']
@@ -147,17 +195,62 @@ class PerformanceTracker:
             f"Profit Factor: {metrics['profit_factor']:.2f}",
             f"Max Drawdown: ${metrics['max_drawdown']:.2f}",
             f"Average R:R: {metrics['avg_rr_ratio']:.2f}",
+        ]
+        
+        # مقاييس المخاطر من التحليلات التدفقية
+        rolling = self.analytics.query(period, self.clock.now())
+        if rolling:
+            report.extend([
+                f"Sharpe (per trade): {rolling['sharpe']:.2f}",
+                f"Sortino (per trade): {rolling['sortino']:.2f}",
+                f"Expectancy: ${rolling['expectancy']:.2f} ({rolling['expectancy_r']:.2f}R)",
+                f"Avg Trade Duration: {rolling['avg_duration_minutes']:.1f} min",
+            ])
+        
+        report.extend([
             "",
             "QUALITY ANALYSIS:"
-        ]
+        ])
         
         for quality, stats in metrics['quality_analysis'].items():
             report.append(f"  {quality}: {stats['count']} trades, {stats['win_rate']:.2%} win rate, Avg P&L: ${stats['avg_pnl']:.2f}")
         
+        attribution = self.rule_attribution()
+        if attribution:
+            report.extend([
+                "",
+                "MANAGEMENT RULES:"
+            ])
+            for rule, stats in sorted(attribution.items(), key=lambda item: -item[1]['pnl']):
+                report.append(f"  {rule}: ${stats['pnl']:.2f} from {stats['exits']} exits, {stats['modifications']} stop moves")
+        
         report.extend([
             "",
             f"Best Performing Pair: {metrics['best_pair']}",
             "=" * 60
         ])
         
-        return "\n".join(report)
\ No newline at end of file
+        return "\n".join(report)
+    
+    def save_trades(self, path):
+        """حفظ سجل الصفقات على القرص"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(self.trades, f)
+    
+    def load_trades(self, path):
+        """تحميل سجل الصفقات من القرص"""
+        with open(path, 'rb') as f:
+            self.restore_trades(pickle.load(f))
+        return len(self.trades)
+    
+    def restore_trades(self, trades):
+        """استبدال سجل الصفقات وإعادة بناء التحليلات التدفقية"""
+        self.trades = trades
+        self.analytics = StreamingAnalytics(self.initial_capital)
+        
+        closed_trades = [trade for trade in trades if trade['result'] is not None]
+        for trade in sorted(closed_trades, key=lambda t: t['exit_time']):
+            self.analytics.update(trade)
\ No newline at end of file
@@ -0,0 +1,239 @@
+from datetime import timezone
+from clock import SYSTEM_CLOCK
+
+
+class PositionManager:
+    """إدارة المراكز بعد الدخول: وقف متحرك بالـ ATR، نقل للتعادل وخروج جزئي"""
+
+    # أعمدة دفتر المراكز لكل زوج؛ كل مركز صف في نفس الفهرس
+    COLUMNS = {
+        'sign': 'int8',             # 1 شراء، -1 بيع
+        'entry': 'float64',
+        'risk': 'float64',          # المسافة الأصلية للوقف (1R)
+        'stop': 'float64',
+        'target': 'float64',
+        'initial_size': 'float64',
+        'open_size': 'float64',
+        'best': 'float64',          # أفضل سعر منذ الدخول
+        'partials_done': 'int8',
+        'break_even': 'bool',
+        'stop_rule': 'int8',        # القاعدة التي وضعت الوقف الحالي
+        'opened_at': 'datetime64[ns]'
+    }
+    STOP_RULES = ['STOP_LOSS', 'BREAK_EVEN', 'TRAILING_STOP']
+
+    def __init__(self, config, clock=None):
+        self.config = config
+        self.clock = clock or SYSTEM_CLOCK
+        self.books = {}
+        self.exits = {}   # order_id -> الخروجات الجزئية المنفذة
+        self.events = []
+        self.stats = {'updates': 0, 'positions_evaluated': 0, 'modifications': 0}
+
+    def _empty_book(self):
+        import numpy as np
+
+        book = {name: np.empty(0, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        book['order_id'] = np.empty(0, dtype=object)
+        return book
+
+    def open_position(self, trade):
+        """إضافة صفقة منفذة لدفتر زوجها"""
+        import numpy as np
+
+        sign = 1 if trade['direction'] in ('BUY', 'LONG') else -1
+        entry = trade['executed_price']
+        risk = abs(entry - trade['sl_price']) or 0.0001
+
+        row = {
+            'sign': sign,
+            'entry': entry,
+            'risk': risk,
+            'stop': trade['sl_price'],
+            'target': trade['tp_price'],
+            'initial_size': trade['position_size'],
+            'open_size': trade['position_size'],
+            'best': entry,
+            'partials_done': 0,
+            'break_even': False,
+            'stop_rule': 0,
+            'opened_at': np.datetime64(self.clock.utcnow(), 'ns'),
+            'order_id': trade['order_id']
+        }
+
+        book = self.books.setdefault(trade['pair'], self._empty_book())
+        for name, values in book.items():
+            book[name] = np.append(values, np.array([row[name]], dtype=values.dtype))
+        self.exits[trade['order_id']] = []
+
+    def remove(self, order_id):
+        """إزالة مركز أُغلق خارج المدير (إغلاق يدوي)"""
+        for book in self.books.values():
+            keep = book['order_id'] != order_id
+            if not keep.all():
+                self._compress(book, keep)
+                self.exits.pop(order_id, None)
+                return True
+        return False
+
+    def snapshot(self):
+        """حالة الدفاتر للحفظ في الحالة الدافئة"""
+        return {'books': self.books, 'exits': self.exits}
+
+    def restore(self, snapshot, order_ids):
+        """استعادة الدفاتر للصفقات التي ما زالت مفتوحة فقط"""
+        import numpy as np
+
+        self.books = {}
+        for pair, book in snapshot['books'].items():
+            keep = np.isin(book['order_id'], list(order_ids))
+            self.books[pair] = {name: values[keep] for name, values in book.items()}
+        self.exits = {order_id: legs for order_id, legs in snapshot['exits'].items() if order_id in order_ids}
+
+        # صفقات بلا صف محفوظ (حالة أقدم) تُسجل من جديد بوقفها الأصلي
+        return order_ids - set(self.exits)
+
+    def open_pairs(self):
+        return [pair for pair, book in self.books.items() if len(book['sign'])]
+
+    def first_opened_at(self, pair):
+        """أقدم وقت دخول بين مراكز الزوج (UTC بدون منطقة زمنية)"""
+        return self.books[pair]['opened_at'].min()
+
+    def drain_events(self):
+        """تعديلات المراكز منذ آخر استدعاء"""
+        events, self.events = self.events, []
+        return events
+
+    @staticmethod
+    def _compress(book, keep):
+        for name in book:
+            book[name] = book[name][keep]
+
+    @staticmethod
+    def _to_utc(bar_time):
+        """توقيت الشمعة كـ UTC بدون منطقة زمنية مثل clock.utcnow()"""
+        import numpy as np
+
+        if getattr(bar_time, 'tzinfo', None) is not None:
+            bar_time = bar_time.astimezone(timezone.utc).replace(tzinfo=None)
+        return np.datetime64(bar_time, 'ns')
+
+    def _event(self, book, index, rule, **details):
+        self.events.append({
+            'order_id': book['order_id'][index],
+            'rule': rule,
+            'time': self.clock.now(),
+            **details
+        })
+
+    def update(self, pair, bar_time, high, low, atr):
+        """تطبيق شمعة جديدة على كل مراكز الزوج دفعة واحدة وإرجاع المراكز المغلقة"""
+        import numpy as np
+
+        book = self.books.get(pair)
+        if book is None or not len(book['sign']):
+            return []
+
+        # الشموع التي بدأت بعد الدخول فقط، حتى لا تُقيَّم شمعة الدخول نفسها
+        live = book['opened_at'] <= self._to_utc(bar_time)
+        if not live.any():
+            return []
+
+        self.stats['updates'] += 1
+        self.stats['positions_evaluated'] += int(live.sum())
+
+        sign, entry, risk = book['sign'], book['entry'], book['risk']
+        is_long = sign > 0
+        favorable = np.where(is_long, high, low)
+        adverse = np.where(is_long, low, high)
+
+        # الوقف الموضوع قبل هذه الشمعة يُفحص أولاً (افتراض متحفظ عند لمس الاثنين)
+        stopped = live & (sign * (adverse - book['stop']) <= 0)
+        taken = live & ~stopped & (sign * (favorable - book['target']) >= 0)
+        survivors = live & ~stopped & ~taken
+
+        # الخروج الجزئي على مستويات R بالترتيب
+        excursion_r = sign * (favorable - entry) / risk
+        for level, (r_level, fraction) in enumerate(self.config.PARTIAL_TP_LEVELS):
+            hit = survivors & (book['partials_done'] == level) & (excursion_r >= r_level)
+            if not hit.any():
+                continue
+
+            size = np.minimum(book['initial_size'] * fraction, book['open_size'])
+            price = entry + sign * r_level * risk
+            book['open_size'] = np.where(hit, book['open_size'] - size, book['open_size'])
+            book['partials_done'] = np.where(hit, book['partials_done'] + 1, book['partials_done']).astype(np.int8)
+
+            for i in np.flatnonzero(hit):
+                leg = {'rule': 'PARTIAL_TP', 'price': float(price[i]), 'size': float(size[i]), 'time': self.clock.now()}
+                self.exits[book['order_id'][i]].append(leg)
+                self._event(book, i, 'PARTIAL_TP', price=float(price[i]), size=float(size[i]))
+
+        flat = survivors & (book['open_size'] <= 1e-9)
+        survivors &= ~flat
+
+        # أفضل سعر منذ الدخول للمراكز المستمرة
+        book['best'] = np.where(
+            survivors,
+            np.where(is_long, np.maximum(book['best'], high), np.minimum(book['best'], low)),
+            book['best']
+        )
+        best_r = sign * (book['best'] - entry) / risk
+
+        # نقل الوقف للتعادل
+        break_even_price = entry + sign * self.config.BREAK_EVEN_OFFSET_PIPS * 0.0001
+        arm = survivors & ~book['break_even'] & (best_r >= self.config.BREAK_EVEN_TRIGGER_R)
+        move = arm & (sign * (break_even_price - book['stop']) > 0)
+        self._move_stops(book, move, break_even_price, 'BREAK_EVEN')
+        book['break_even'] |= arm
+
+        # الوقف المتحرك: لا يتحرك إلا في اتجاه الربح
+        trail_price = book['best'] - sign * self.config.TRAILING_ATR_MULTIPLIER * atr
+        trail = survivors & (best_r >= self.config.TRAILING_ACTIVATION_R) & (sign * (trail_price - book['stop']) > 0)
+        self._move_stops(book, trail, trail_price, 'TRAILING_STOP')
+
+        closed = stopped | taken | flat
+        if not closed.any():
+            return []
+
+        closures = []
+        for i in np.flatnonzero(closed):
+            order_id = book['order_id'][i]
+            legs = self.exits.pop(order_id)
+            if stopped[i]:
+                rule, price, status = self.STOP_RULES[book['stop_rule'][i]], float(book['stop'][i]), 'STOPPED'
+            elif taken[i]:
+                rule, price, status = 'TAKE_PROFIT', float(book['target'][i]), 'TAKEN'
+            else:
+                rule, price, status = 'PARTIAL_TP', legs[-1]['price'], 'TAKEN'
+
+            if book['open_size'][i] > 1e-9:
+                legs.append({'rule': rule, 'price': price, 'size': float(book['open_size'][i]), 'time': self.clock.now()})
+
+            closures.append({
+                'order_id': order_id,
+                'status': status,
+                'exit_reason': rule,
+                'exit_price': price,
+                'exit_time': self.clock.now(),
+                'exits': legs
+            })
+
+        self._compress(book, ~closed)
+        return closures
+
+    def _move_stops(self, book, mask, new_stops, rule):
+        """تحريك الوقف للمراكز المحددة وتسجيل كل تعديل"""
+        import numpy as np
+
+        if not mask.any():
+            return
+
+        new_stops = np.broadcast_to(new_stops, mask.shape)
+        for i in np.flatnonzero(mask):
+            self._event(book, i, rule, old_stop=float(book['stop'][i]), new_stop=float(new_stops[i]))
+
+        book['stop'] = np.where(mask, new_stops, book['stop'])
+        book['stop_rule'] = np.where(mask, self.STOP_RULES.index(rule), book['stop_rule']).astype(np.int8)
+        self.stats['modifications'] += int(mask.sum())
\ No newline at end of file
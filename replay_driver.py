@@ -0,0 +1,179 @@
+import contextlib
+import io
+import os
+import pickle
+import time
+from datetime import timedelta
+from clock import SimulatedClock
+from data_aggregator import DataAggregator
+from feature_store import FeatureStore
+from kill_zone_manager import KillZoneManager
+
+
+# أطوال الفترات التي يطلبها الكود الحي من yfinance
+PERIODS = {'1d': timedelta(days=1), '2d': timedelta(days=2), '3d': timedelta(days=3),
+           '5d': timedelta(days=5), '7d': timedelta(days=7)}
+
+# مدة كل شمعة حتى لا تُقدَّم شمعة قبل إغلاقها
+INTERVALS = {'1m': timedelta(minutes=1), '3m': timedelta(minutes=3), '5m': timedelta(minutes=5),
+             '15m': timedelta(minutes=15), '1h': timedelta(hours=1)}
+
+
+def record_bars(config, period='7d', path=None):
+    """تسجيل الشموع الحالية من yfinance لإعادة تشغيلها لاحقاً"""
+    import yfinance as yf
+
+    recording = {}
+    for pair in config.PAIRS:
+        yf_symbol = f"{pair[:3]}=X"
+        recording[pair] = {
+            tf_name: yf.download(yf_symbol, period=period, interval=tf_interval)
+            for tf_name, tf_interval in config.TIMEFRAMES.items()
+        }
+
+    if path:
+        save_recording(recording, path)
+    return recording
+
+
+def save_recording(recording, path):
+    """حفظ تسجيل الشموع"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump(recording, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_recording(path):
+    """تحميل تسجيل الشموع"""
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+class ReplayDataAggregator(DataAggregator):
+    """يقدم الشموع المسجلة المغلقة حتى وقت الساعة بدلاً من yfinance"""
+
+    def __init__(self, config, clock, recording):
+        super().__init__(config, clock)
+        self.recording = {}
+        self.bar_times = {}
+
+        for pair, timeframes in recording.items():
+            for tf_name, df in timeframes.items():
+                # توحيد الفهرس إلى UTC بدون منطقة زمنية مثل الساعة
+                if df.index.tz is not None:
+                    df = df.tz_convert('UTC').tz_localize(None)
+                df = self.validator.validate(df, pair, tf_name, config.TIMEFRAMES.get(tf_name, '1m'))
+                self.recording[(pair, tf_name)] = df
+                self.bar_times[(pair, tf_name)] = df.index.values
+
+    def time_range(self):
+        """أول وآخر شمعة في التسجيل"""
+        starts = [df.index[0] for df in self.recording.values() if not df.empty]
+        ends = [df.index[-1] for df in self.recording.values() if not df.empty]
+        return min(starts).to_pydatetime(), max(ends).to_pydatetime()
+
+    def get_multi_timeframe_data(self, pair, period='5d', config=None):
+        """نفس واجهة DataAggregator لكن من التسجيل"""
+        import numpy as np
+
+        config = config or self.config
+        now = np.datetime64(self.clock.now())
+        lookback = np.timedelta64(PERIODS.get(period, timedelta(days=5)))
+        multi_tf_data = {}
+
+        for tf_name, tf_interval in config.TIMEFRAMES.items():
+            key = (pair, tf_name)
+            if key not in self.recording:
+                continue
+
+            # الشموع المغلقة فقط: بدايتها + مدتها <= الآن
+            times = self.bar_times[key]
+            interval = np.timedelta64(INTERVALS.get(tf_interval, timedelta(minutes=1)))
+            start = np.searchsorted(times, now - lookback, side='left')
+            end = np.searchsorted(times, now - interval, side='right')
+
+            if end <= start:
+                continue
+
+            multi_tf_data[tf_name] = self._get_slice_indicators(key, period, start, end, tf_name, config)
+
+        return multi_tf_data
+
+    def _get_slice_indicators(self, key, period, start, end, tf_name, config):
+        """المؤشرات لكل شريحة مرة واحدة: الأطر الأكبر لا تُعاد إلا عند إغلاق شمعة جديدة"""
+        # الفترة ضمن المفتاح حتى لا تُبطل شريحة '2d' شريحة '3d' لنفس الزوج
+        cache_key = (key, period, self.indicator_params(config))
+        cached = self.indicator_cache.get(cache_key)
+        if cached is not None and cached[0] == (start, end):
+            self.stats['indicator_hits'] += 1
+            return cached[1]
+
+        frame = self._add_technical_indicators(self.recording[key].iloc[start:end].copy(), tf_name, config)
+        self.indicator_cache[cache_key] = ((start, end), frame)
+        self.stats['indicator_runs'] += 1
+        return frame
+
+
+class ReplayKillZoneManager(KillZoneManager):
+    """تقويم اقتصادي مسجل بدلاً من الطلب الشبكي"""
+
+    def __init__(self, config, clock, calendar_events=None):
+        super().__init__(config, clock)
+        self.calendar_events = calendar_events or []
+
+    def _get_calendar_events(self):
+        return self.calendar_events
+
+
+class ReplayDriver:
+    """تشغيل مسار HybridConfluenceScalper الحي نفسه على بيانات مسجلة دون انتظار"""
+
+    # بيانات الإحماء قبل أول دورة حتى تكتمل المؤشرات
+    WARMUP = timedelta(days=1)
+
+    def __init__(self, recording, start=None, end=None, calendar_events=None,
+                 initial_capital=10000, record_features=False):
+        from main import HybridConfluenceScalper
+
+        self.clock = SimulatedClock(start)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.strategy = HybridConfluenceScalper(
+                live_trading=False, initial_capital=initial_capital, clock=self.clock
+            )
+
+        config = self.strategy.config
+        self.strategy.data_aggregator = ReplayDataAggregator(config, self.clock, recording)
+        self.strategy.kill_zone_manager = ReplayKillZoneManager(config, self.clock, calendar_events)
+        # صفوف الإعادة في مخزن منفصل بكاتب لكل عملية: لا تختلط بالصفوف الحية ولا تتصادم الملفات
+        self.strategy.feature_store = FeatureStore(
+            config, root=os.path.join(config.FEATURE_STORE_PATH, 'replay'),
+            writer_id=f"replay{os.getpid()}", clock=self.clock
+        ) if record_features else None
+
+        first_bar, last_bar = self.strategy.data_aggregator.time_range()
+        self.start = start or first_bar + self.WARMUP
+        self.end = end or last_bar
+        self.clock.set(self.start)
+
+    def run(self, verbose=False):
+        """تشغيل الحلقة حتى نهاية الفترة وإرجاع إحصائيات السرعة"""
+        started = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            if not verbose:
+                devnull = stack.enter_context(open(os.devnull, 'w'))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            # الإيقاف بالساعة لا بعدد الدورات: دورات الخطأ تنتظر ERROR_BACKOFF_SECONDS
+            iterations = self.strategy.run_strategy(should_stop=lambda: self.clock.now() >= self.end)
+        elapsed = time.perf_counter() - started
+
+        simulated = (self.clock.now() - self.start).total_seconds()
+        return {
+            'iterations': iterations,
+            'simulated_seconds': simulated,
+            'wall_seconds': elapsed,
+            'speedup': simulated / elapsed if elapsed > 0 else float('inf'),
+            'trades': len(self.strategy.performance_tracker.trades)
+        }
\ No newline at end of file
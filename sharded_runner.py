@@ -0,0 +1,274 @@
+import multiprocessing as mp
+import time
+from multiprocessing.connection import wait
+from datetime import datetime
+from hybrid_config import HybridConfig
+
+
+def split_pairs(pairs, shard_count):
+    """توزيع الأزواج على الشظايا بالتناوب"""
+    shard_count = max(1, min(shard_count, len(pairs)))
+    return [list(pairs[i::shard_count]) for i in range(shard_count)]
+
+
+def _shard_worker_main(shard_id, pairs, connection, trading_open, stop_flag):
+    """حلقة العامل: بيانات ومؤشرات وتحليل لأزواج الشظية فقط
+
+    الرسائل تمر عبر أنبوب خاص بالعامل والأعلام قيم مشتركة بلا أقفال،
+    فقتل العامل في أي لحظة لا يترك قفلاً أو Condition مشتركاً معطلاً.
+    """
+    # الاستيراد داخل العملية الفرعية حتى تبني كل شظية مكدسها الخاص
+    from data_aggregator import DataAggregator
+    from feature_store import FeatureStore
+    from fetch_layer import ResilientFetcher
+    from hybrid_analyzer import HybridAnalyzer
+    from kill_zone_manager import KillZoneManager
+
+    config = HybridConfig()
+    fetcher = ResilientFetcher(config)
+    data_aggregator = DataAggregator(config, fetcher=fetcher)
+    analyzer = HybridAnalyzer(config)
+    kill_zone_manager = KillZoneManager(config, fetcher=fetcher)
+    # كل شظية تكتب مقاطعها وفهرسها الخاص في نفس مخزن الخصائص
+    feature_store = FeatureStore(config, writer_id=f"shard{shard_id}") if config.FEATURE_STORE_ENABLED else None
+
+    print(f"🧩 Shard {shard_id} started (pid {mp.current_process().pid}): {pairs}")
+
+    while not stop_flag.value:
+        cycle_start = time.time()
+
+        # لا داعي للتحليل إذا أغلق المدير المركزي باب التداول
+        if trading_open.value:
+            for pair in pairs:
+                try:
+                    market_data = data_aggregator.get_multi_timeframe_data(pair, '3d')
+                    if not market_data or data_aggregator.is_stale(pair):
+                        continue
+
+                    signal = analyzer.generate_hybrid_signal(market_data, pair)
+                    if feature_store:
+                        # فشل التسجيل لا يجب أن يُسقط إشارة صالحة
+                        try:
+                            feature_store.record_evaluation(
+                                pair, market_data, analyzer, data_aggregator,
+                                kill_zone_manager.get_active_kill_zone()
+                            )
+                        except Exception as e:
+                            print(f"⚠️  Shard {shard_id} feature store skipped {pair}: {e}")
+                    if signal:
+                        signal['pair'] = pair
+                        connection.send(('SIGNAL', shard_id, signal))
+                except Exception as e:
+                    print(f"❌ Shard {shard_id} error processing {pair}: {e}")
+
+        # البيانات الخام تتجدد كل دورة كما في الوضع الأحادي
+        data_aggregator.clear_cache()
+        connection.send(('HEARTBEAT', shard_id, time.time()))
+
+        # نوم مع استطلاع علم الإيقاف بدلاً من الانتظار على Event مشترك
+        deadline = cycle_start + config.SHARD_CYCLE_SECONDS
+        while not stop_flag.value and time.time() < deadline:
+            time.sleep(min(1.0, max(0, deadline - time.time())))
+
+    if feature_store:
+        feature_store.flush()
+
+
+class ShardSupervisor:
+    """مشرف يوزع الأزواج على عمليات عاملة ويملك المخاطر والتنفيذ مركزياً"""
+
+    def __init__(self, live_trading=False, initial_capital=10000, shard_count=None):
+        # الاستيراد هنا حتى لا تحمل العمليات الفرعية مكدس التنفيذ
+        from main import HybridConfluenceScalper
+
+        # المحرك المركزي: مدير المخاطر والتنفيذ وتتبع الأداء لكل المحفظة
+        self.central = HybridConfluenceScalper(live_trading, initial_capital)
+        self.config = self.central.config
+
+        shard_count = shard_count or self.config.SHARD_COUNT
+        self.shards = split_pairs(self.config.PAIRS, shard_count)
+
+        # أعلام بايت واحد بلا قفل: القراءة والكتابة لا تنتظر أي عملية أخرى
+        self.trading_open = mp.RawValue('b', 1)
+        self.stop_flag = mp.RawValue('b', 0)
+
+        self.workers = {}
+        self.connections = {}  # shard_id -> طرف القراءة من أنبوب العامل
+        self.last_heartbeat = {}
+        self.restart_counts = {shard_id: 0 for shard_id in range(len(self.shards))}
+
+    def _start_worker(self, shard_id):
+        """تشغيل (أو إعادة تشغيل) عامل شظية بأنبوب جديد"""
+        self._close_connection(shard_id)
+        reader, writer = mp.Pipe(duplex=False)
+        process = mp.Process(
+            target=_shard_worker_main,
+            args=(shard_id, self.shards[shard_id], writer,
+                  self.trading_open, self.stop_flag),
+            name=f"shard-{shard_id}",
+            daemon=True
+        )
+        process.start()
+        # طرف الكتابة للعامل وحده حتى يصل EOF عند موته
+        writer.close()
+        self.workers[shard_id] = process
+        self.connections[shard_id] = reader
+        self.last_heartbeat[shard_id] = time.time()
+
+    def _close_connection(self, shard_id):
+        connection = self.connections.pop(shard_id, None)
+        if connection is not None:
+            connection.close()
+
+    def _check_workers(self):
+        """إعادة تشغيل العمال المنهارين أو المعلقين"""
+        now = time.time()
+        for shard_id, process in list(self.workers.items()):
+            stalled = now - self.last_heartbeat[shard_id] > self.config.SHARD_HEARTBEAT_TIMEOUT
+
+            if process.is_alive() and not stalled:
+                continue
+
+            if process.is_alive():
+                print(f"⚠️  Shard {shard_id} stalled, terminating...")
+                process.terminate()
+
+            process.join(timeout=5)
+            self.restart_counts[shard_id] += 1
+            print(f"🔁 Restarting shard {shard_id} (exit code {process.exitcode}, "
+                  f"restart #{self.restart_counts[shard_id]})")
+
+            # الصفقات المفتوحة محفوظة في المنفذ المركزي فلا تتأثر بإعادة التشغيل
+            self._start_worker(shard_id)
+
+    def _sync_trading_gate(self):
+        """إبلاغ العمال بحالة حدود التداول العامة"""
+        can_trade, _ = self.central.risk_manager.can_trade('HIGH')
+        self.trading_open.value = 1 if can_trade else 0
+
+    def _handle_message(self, message):
+        """معالجة رسالة واردة من عامل وإرجاع الإشارة الصالحة إن وجدت"""
+        kind, shard_id, payload = message
+
+        if kind == 'HEARTBEAT':
+            self.last_heartbeat[shard_id] = payload
+            return None
+
+        if kind == 'SIGNAL':
+            signal = payload
+            self.last_heartbeat[shard_id] = time.time()
+
+            age = (datetime.now() - signal['timestamp']).total_seconds()
+            if age > self.config.SHARD_SIGNAL_MAX_AGE:
+                print(f"⌛ Dropping stale signal for {signal['pair']} ({age:.0f}s old)")
+                return None
+
+            print(f"🎯 Shard {shard_id} signal for {signal['pair']}: {signal['direction']} "
+                  f"(Score: {signal['score']}/10, Quality: {signal['quality']})")
+            return signal
+
+        return None
+
+    def _register_signals(self, signals):
+        """فحص السجل المركزي: العامل المعاد تشغيله يبدأ بسجل فارغ"""
+        registry = self.central.analyzer.signal_registry
+        accepted = []
+        for signal in signals:
+            is_new, reason = registry.check(
+                signal['pair'], signal['direction'], signal.get('structure_level'), signal['timestamp']
+            )
+            if not is_new:
+                print(f"🔁 Signal suppressed: {reason}")
+                continue
+            registry.register(signal['pair'], signal['direction'], signal.get('structure_level'), signal['timestamp'])
+            accepted.append(signal)
+        return accepted
+
+    def _handle_signals(self, signals):
+        """تقييم دفعة الإشارات ثم تنفيذها تسلسلياً"""
+        signals = self._register_signals(signals)
+        self.central.quality_model.apply(signals)
+
+        # معالجة تسلسلية في عملية واحدة تبقي MAX_DAILY_TRADES عامة
+        for signal in signals:
+            self.central.handle_hybrid_signal(signal['pair'], signal)
+            self._sync_trading_gate()
+
+    def _receive(self, shard_id, connection, messages):
+        """سحب كل ما وصل من عامل؛ الأنبوب المقطوع يُغلق حتى يعاد تشغيل عامله"""
+        try:
+            while connection.poll():
+                messages.append(connection.recv())
+        except Exception as e:
+            # EOF أو رسالة مبتورة من عامل قُتل أثناء الإرسال
+            print(f"⚠️  Shard {shard_id} connection lost: {str(e) or type(e).__name__}")
+            self._close_connection(shard_id)
+
+    def _drain_signals(self, deadline):
+        """استقبال رسائل العمال حتى نهاية الدورة"""
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+
+            readers = {connection: shard_id for shard_id, connection in self.connections.items()}
+            if not readers:
+                time.sleep(min(remaining, 1.0))
+                continue
+
+            # سحب كل ما وصل بالفعل لتقييمه دفعة واحدة
+            messages = []
+            for connection in wait(list(readers), timeout=min(remaining, 1.0)):
+                self._receive(readers[connection], connection, messages)
+
+            signals = [signal for signal in map(self._handle_message, messages) if signal]
+            if signals:
+                self._handle_signals(signals)
+
+    def run(self):
+        """تشغيل المشرف والعمال"""
+        print("\n" + "="*60)
+        print(f"STARTING SHARDED HYBRID SCALPER ({len(self.shards)} shards)")
+        print("="*60)
+
+        for shard_id in range(len(self.shards)):
+            self._start_worker(shard_id)
+
+        try:
+            while True:
+                try:
+                    deadline = time.time() + self.config.SHARD_CYCLE_SECONDS
+
+                    self.central._update_market_conditions()
+                    self._sync_trading_gate()
+                    self._drain_signals(deadline)
+
+                    self.central._monitor_active_trades()
+                    self._check_workers()
+
+                except KeyboardInterrupt:
+                    print("\n🛑 Sharded strategy stopped by user")
+                    break
+                except Exception as e:
+                    print(f"❌ Error in supervisor loop: {e}")
+                    time.sleep(5)
+        finally:
+            self.stop()
+
+    def stop(self):
+        """إيقاف جميع العمال"""
+        self.stop_flag.value = 1
+        for shard_id, process in self.workers.items():
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+            self._close_connection(shard_id)
+
+
+if __name__ == "__main__":
+    supervisor = ShardSupervisor(live_trading=False, initial_capital=10000)
+
+    try:
+        supervisor.run()
+    finally:
+        supervisor.central.generate_final_report()
\ No newline at end of file
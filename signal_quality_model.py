@@ -0,0 +1,163 @@
+import os
+import time
+
+
+class SignalQualityModel:
+    """نموذج اختياري لاحتمال نجاح الإشارة مدرّب مسبقاً على نتائج الصفقات"""
+
+    # ربط تفاصيل النقاط في HybridAnalyzer بمفاتيح SCORING_SYSTEM
+    DETAIL_FEATURES = {
+        'Kill Zone Active': 'kill_zone',
+        'Bias Alignment': 'bias_alignment',
+        'Liquidity Sweep': 'liquidity_sweep',
+        'CHoCH Detected': 'choch',
+        'Volume Spike': 'volume_spike',
+        'RSI Confirmation': 'rsi_confirmation',
+        'EMA Alignment': 'ema_alignment',
+        'DXY Confirmation': 'dxy_confirmation'
+    }
+
+    def __init__(self, config):
+        self.config = config
+        self.feature_names = list(config.SCORING_SYSTEM.keys()) + ['score']
+        self.weights = None
+        self.bias = 0.0
+        self.enabled = False
+        self.budget_overruns = 0
+        self.last_latency_ms = 0.0
+
+    def build_features(self, signals):
+        """مصفوفة الخصائص (n, d) لمجموعة إشارات دفعة واحدة"""
+        import numpy as np
+
+        flag_names = self.feature_names[:-1]
+        features = np.zeros((len(signals), len(self.feature_names)), dtype=np.float32)
+
+        for row, signal in enumerate(signals):
+            for detail in signal.get('details', []):
+                feature = self.DETAIL_FEATURES.get(detail)
+                if feature in flag_names:
+                    features[row, flag_names.index(feature)] = 1.0
+            features[row, -1] = signal['score'] / 10.0
+
+        return features
+
+    def predict_proba(self, features):
+        """استدلال دفعي: انحدار لوجستي بعملية ضرب مصفوفات واحدة"""
+        import numpy as np
+
+        logits = features @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def apply(self, signals):
+        """إضافة احتمال النجاح والجودة المتعلمة لكل الإشارات المرشحة"""
+        if not self.enabled or not signals:
+            return signals
+
+        started = time.perf_counter()
+        probabilities = self.predict_proba(self.build_features(signals))
+        self.last_latency_ms = (time.perf_counter() - started) * 1000
+
+        # تجاوز الميزانية الزمنية بشكل متكرر يعيدنا للعتبات الثابتة
+        if self.last_latency_ms > self.config.QUALITY_MODEL_LATENCY_BUDGET_MS:
+            self.budget_overruns += 1
+            print(f"⚠️  Quality model took {self.last_latency_ms:.2f}ms "
+                  f"(budget {self.config.QUALITY_MODEL_LATENCY_BUDGET_MS}ms)")
+            if self.budget_overruns >= self.config.QUALITY_MODEL_MAX_OVERRUNS:
+                print("⚠️  Quality model disabled, falling back to score cutoffs")
+                self.enabled = False
+        else:
+            self.budget_overruns = 0
+
+        thresholds = self.config.QUALITY_MODEL_THRESHOLDS
+        for signal, probability in zip(signals, probabilities):
+            probability = float(probability)
+            signal['win_probability'] = probability
+            if probability >= thresholds['HIGH']:
+                signal['quality'] = 'HIGH'
+            elif probability >= thresholds['MEDIUM']:
+                signal['quality'] = 'MEDIUM'
+            else:
+                signal['quality'] = 'LOW'
+
+        return signals
+
+    def train(self, signals, outcomes):
+        """تدريب غير متصل على خصائص الإشارات ونتائجها (1 ربح / 0 خسارة) بترتيب زمني
+
+        يُقيَّم النموذج على آخر الصفقات المحجوزة ثم يُعاد تدريبه على الكل.
+        """
+        import numpy as np
+        from sklearn.linear_model import LogisticRegression
+
+        features = self.build_features(signals)
+        labels = np.asarray(outcomes, dtype=np.int8)
+
+        # آخر الصفقات للتقييم فقط: دقة بيانات التدريب نفسها متفائلة دائماً
+        holdout = int(len(labels) * self.config.QUALITY_MODEL_HOLDOUT_FRACTION)
+        split = len(labels) - holdout
+        if holdout < 1 or len(set(labels[:split].tolist())) < 2:
+            raise ValueError("Training requires both winning and losing trades before the held-out trades")
+
+        # بدون موازنة الفئات: الاحتمالات تُستخدم كاحتمال ربح فعلي في العتبات وتحجيم المركز
+        model = LogisticRegression(max_iter=1000)
+        model.fit(features[:split], labels[:split])
+        metrics = {
+            'holdout_trades': holdout,
+            'holdout_accuracy': float(model.score(features[split:], labels[split:])),
+            'holdout_win_rate': float(labels[split:].mean()),
+            'holdout_mean_probability': float(model.predict_proba(features[split:])[:, 1].mean())
+        }
+
+        model.fit(features, labels)
+
+        # الاحتفاظ بالمعاملات فقط: لا حاجة لـ scikit-learn وقت التشغيل
+        self.weights = model.coef_[0].astype(np.float32)
+        self.bias = float(model.intercept_[0])
+        self.enabled = True
+        return metrics
+
+    def train_from_trades(self, trades):
+        """تدريب من سجل PerformanceTracker المغلق بترتيب الإغلاق"""
+        closed_trades = sorted(
+            (trade for trade in trades if trade['result'] is not None),
+            key=lambda trade: trade['exit_time']
+        )
+        outcomes = [1 if trade['result'] == 'WIN' else 0 for trade in closed_trades]
+        return self.train(closed_trades, outcomes)
+
+    def save(self, path=None):
+        """حفظ مضغوط للمعاملات بصيغة npz"""
+        import numpy as np
+
+        path = path or self.config.QUALITY_MODEL_PATH
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=np.float32(self.bias),
+            feature_names=np.array(self.feature_names)
+        )
+
+    def load(self, path=None):
+        """تحميل النموذج إن وجد، وإلا تبقى العتبات الثابتة فعالة"""
+        path = path or self.config.QUALITY_MODEL_PATH
+        if not os.path.exists(path):
+            return False
+
+        import numpy as np
+
+        with np.load(path) as data:
+            feature_names = data['feature_names'].tolist()
+            if feature_names != self.feature_names:
+                print(f"⚠️  Quality model features {feature_names} do not match config, ignoring")
+                return False
+            self.weights = data['weights']
+            self.bias = float(data['bias'])
+
+        self.enabled = True
+        self.budget_overruns = 0
+        return True
\ No newline at end of file
@@ -0,0 +1,90 @@
+from collections import deque
+from datetime import datetime, timedelta
+
+
+class SignalRegistry:
+    """سجل الإشارات لمنع تكرار الدخول على نفس الإعداد"""
+
+    def __init__(self, config):
+        self.config = config
+        self.default_cooldown = timedelta(minutes=config.SIGNAL_COOLDOWN_MINUTES)
+        self.cooldowns = {
+            pair: timedelta(minutes=minutes)
+            for pair, minutes in config.SIGNAL_COOLDOWN_OVERRIDES.items()
+        }
+        self.expiry = timedelta(minutes=config.SIGNAL_EXPIRY_MINUTES)
+
+        # (pair, direction, structure_level) -> وقت آخر إشارة
+        self.entries = {}
+        self.pair_last_signal = {}
+        self._expiry_queue = deque()  # (time, key) بترتيب التسجيل
+
+        self.stats = {
+            'checks': 0,
+            'passed': 0,
+            'cooldown_hits': 0,
+            'duplicate_hits': 0,
+            'registered': 0,
+            'expired': 0
+        }
+
+    @staticmethod
+    def make_key(pair, direction, structure_level):
+        """مفتاح الإعداد: الزوج والاتجاه ومستوى الهيكل (القمة/القاع)"""
+        level = round(float(structure_level), 5) if structure_level is not None else None
+        return (pair, direction, level)
+
+    def _purge_expired(self, now):
+        """حذف الإدخالات المنتهية: تكلفة ثابتة مطفأة لكل عملية"""
+        while self._expiry_queue and now - self._expiry_queue[0][0] >= self.expiry:
+            registered_at, key = self._expiry_queue.popleft()
+            # الإدخال قد يكون تجدد بعد تسجيله في الطابور
+            if self.entries.get(key) == registered_at:
+                del self.entries[key]
+                self.stats['expired'] += 1
+
+    def in_cooldown(self, pair, now=None):
+        """فحص فترة التهدئة الخاصة بالزوج"""
+        now = now or datetime.now()
+        last_signal = self.pair_last_signal.get(pair)
+        cooldown = self.cooldowns.get(pair, self.default_cooldown)
+        return last_signal is not None and now - last_signal < cooldown
+
+    def check(self, pair, direction=None, structure_level=None, now=None):
+        """التحقق من إمكانية إصدار إشارة قبل الحسابات المكلفة"""
+        now = now or datetime.now()
+        self._purge_expired(now)
+        self.stats['checks'] += 1
+
+        if self.in_cooldown(pair, now):
+            self.stats['cooldown_hits'] += 1
+            return False, f"{pair} in cooldown"
+
+        if direction is not None:
+            key = self.make_key(pair, direction, structure_level)
+            if key in self.entries:
+                self.stats['duplicate_hits'] += 1
+                return False, f"Duplicate setup {key}"
+
+        self.stats['passed'] += 1
+        return True, "OK"
+
+    def register(self, pair, direction, structure_level, now=None):
+        """تسجيل إشارة صادرة"""
+        now = now or datetime.now()
+        key = self.make_key(pair, direction, structure_level)
+
+        self.entries[key] = now
+        self.pair_last_signal[pair] = now
+        self._expiry_queue.append((now, key))
+        self.stats['registered'] += 1
+
+    def get_stats(self):
+        """إحصائيات الاستخدام ونسبة الحجب"""
+        checks = self.stats['checks']
+        blocked = self.stats['cooldown_hits'] + self.stats['duplicate_hits']
+        return {
+            **self.stats,
+            'active_entries': len(self.entries),
+            'hit_rate': blocked / checks if checks else 0
+        }
\ No newline at end of file
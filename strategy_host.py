@@ -0,0 +1,125 @@
+import os
+from clock import SYSTEM_CLOCK
+from data_aggregator import DataAggregator
+from fetch_layer import ResilientFetcher
+from hybrid_config import HybridConfig
+
+
+class MarketDataView:
+    """واجهة DataAggregator لاستراتيجية واحدة فوق طبقة بيانات مشتركة"""
+
+    def __init__(self, shared, config):
+        self.shared = shared
+        self.config = config
+
+    def get_multi_timeframe_data(self, pair, period='5d'):
+        # المؤشرات تُحسب بمعاملات هذه الاستراتيجية وتُشارك مع من يطابقها
+        return self.shared.get_multi_timeframe_data(pair, period, self.config)
+
+    def is_stale(self, pair):
+        return self.shared.is_stale(pair, self.config)
+
+    def detect_trend_strength(self, df):
+        # أعمدة المتوسطات تتبع EMA_PERIODS الخاصة بهذه الاستراتيجية
+        return self.shared.detect_trend_strength(df, self.config)
+
+    def __getattr__(self, name):
+        # باقي الدوال (التقلبات، الاتجاه، الذاكرة المؤقتة) من الطبقة المشتركة
+        return getattr(self.shared, name)
+
+
+def make_variant_config(name, overrides):
+    """إنشاء نسخة من HybridConfig بإعدادات مختلفة"""
+    return type(f"HybridConfig_{name}", (HybridConfig,), dict(overrides))()
+
+
+class StrategyHost:
+    """تشغيل عدة نسخ من الاستراتيجية فوق طبقة بيانات ومؤشرات واحدة"""
+
+    def __init__(self, variants, live_trading=False, initial_capital=10000, clock=None):
+        from feature_store import FeatureStore
+        from main import HybridConfluenceScalper
+
+        self.clock = clock or SYSTEM_CLOCK
+        self.base_config = HybridConfig()
+        # طبقة جلب واحدة: التقويم والشموع يُجلبان وتُقطع دوائرهما مرة واحدة لكل النسخ
+        self.fetcher = ResilientFetcher(self.base_config, self.clock)
+        self.market_data = DataAggregator(self.base_config, self.clock, self.fetcher)
+
+        # variants: {name: {إعداد: قيمة}}
+        self.strategies = {}
+        for name, overrides in variants.items():
+            config = make_variant_config(name, overrides)
+            strategy = HybridConfluenceScalper(
+                live_trading=live_trading,
+                initial_capital=initial_capital,
+                clock=self.clock,
+                config=config,
+                data_aggregator=MarketDataView(self.market_data, config),
+                fetcher=self.fetcher
+            )
+            if strategy.feature_store:
+                # مجلد لكل نسخة حتى لا تختلط صفوف النسخ عند القراءة
+                strategy.feature_store = FeatureStore(config, root=os.path.join(config.FEATURE_STORE_PATH, name), clock=self.clock)
+            self.strategies[name] = strategy
+
+    def run_cycle(self, iteration):
+        """دورة واحدة: تحميل البيانات مرة واحدة ثم تمريرها لكل الاستراتيجيات"""
+        # تثبيت البيانات طوال الدورة حتى ترى كل النسخ نفس الشموع
+        self.market_data.pinned = False
+        self.market_data.clear_cache()
+        self.market_data.pinned = True
+
+        for name, strategy in self.strategies.items():
+            print(f"\n🧪 Strategy [{name}]")
+            try:
+                strategy.run_cycle(iteration)
+            except Exception as e:
+                print(f"❌ Error in strategy {name}: {e}")
+
+        stats = self.market_data.stats
+        print(f"\n📦 Shared data: {stats['downloads']} downloads, "
+              f"{stats['indicator_runs']} indicator runs, {stats['indicator_hits']} reuses")
+
+    def run(self, max_iterations=None):
+        """تشغيل المضيف بشكل مستمر"""
+        print("\n" + "="*60)
+        print(f"STARTING STRATEGY HOST ({len(self.strategies)} variants: {', '.join(self.strategies)})")
+        print("="*60)
+
+        iteration = 0
+        while max_iterations is None or iteration < max_iterations:
+            try:
+                iteration += 1
+                self.run_cycle(iteration)
+                self.clock.sleep(self.base_config.CYCLE_SECONDS)
+
+            except KeyboardInterrupt:
+                print("\n🛑 Strategy host stopped by user")
+                break
+            except Exception as e:
+                print(f"❌ Error in host loop: {e}")
+                self.clock.sleep(self.base_config.ERROR_BACKOFF_SECONDS)
+
+        for strategy in self.strategies.values():
+            if strategy.feature_store:
+                strategy.feature_store.flush()
+
+    def generate_final_report(self):
+        """تقرير نهائي لكل نسخة"""
+        for name, strategy in self.strategies.items():
+            print(f"\n🧪 Strategy [{name}]")
+            strategy.generate_final_report()
+
+
+if __name__ == "__main__":
+    host = StrategyHost({
+        'baseline': {},
+        'strict': {'MINIMUM_SCORE': 8, 'BASE_RISK': 0.004},
+        'london_only': {'KILL_ZONES': [(7, 10)]}
+    })
+
+    try:
+        host.run()
+    finally:
+        host.generate_final_report()
\ No newline at end of file
@@ -0,0 +1,263 @@
+import math
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+
+class _RunningStats:
+    """إحصائيات تراكمية بسيطة لمجموعة من الصفقات"""
+
+    __slots__ = ('count', 'wins', 'total_pnl', 'sum_sq_pnl', 'gross_profit', 'gross_loss')
+
+    def __init__(self):
+        self.count = 0
+        self.wins = 0
+        self.total_pnl = 0.0
+        self.sum_sq_pnl = 0.0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+
+    def update(self, pnl):
+        self.count += 1
+        self.total_pnl += pnl
+        self.sum_sq_pnl += pnl * pnl
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        else:
+            self.gross_loss += -pnl
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'win_rate': self.wins / self.count if self.count else 0,
+            'total_pnl': self.total_pnl,
+            'avg_pnl': self.total_pnl / self.count if self.count else 0,
+            'profit_factor': self.gross_profit / self.gross_loss if self.gross_loss > 0 else float('inf')
+        }
+
+
+class _DecimatedSeries:
+    """سلسلة مخفّضة الدقة بحجم محدود لرسم منحنى رأس المال"""
+
+    def __init__(self, max_points=2000):
+        self.max_points = max_points
+        self.stride = 1
+        self.seen = 0
+        self.points = []
+        self.last = None
+
+    def append(self, point):
+        # عند الامتلاء يُحذف كل نقطة ثانية وتتضاعف الخطوة: تكلفة ثابتة مطفأة
+        if self.seen % self.stride == 0:
+            self.points.append(point)
+            if len(self.points) >= 2 * self.max_points:
+                self.points = self.points[::2]
+                self.stride *= 2
+        self.seen += 1
+        self.last = point
+
+    def to_list(self):
+        """النقاط المخفضة مع آخر نقطة دائماً"""
+        if self.last is not None and (not self.points or self.points[-1] is not self.last):
+            return self.points + [self.last]
+        return list(self.points)
+
+
+class StreamingAnalytics:
+    """محرك تحليلات تدفقي يحدّث المقاييس مع إغلاق كل صفقة"""
+
+    # حدود فئات مدة الصفقة بالدقائق
+    DURATION_BUCKETS = [5, 15, 30, 60, 120, 240, 480]
+
+    # النوافذ الافتراضية: مدة زمنية أو عدد آخر الصفقات
+    DEFAULT_WINDOWS = {
+        'WEEK': timedelta(days=7),
+        'MONTH': timedelta(days=30),
+        'LAST_50': 50
+    }
+
+    def __init__(self, initial_capital=10000, windows=None):
+        self.initial_capital = initial_capital
+        self.equity = initial_capital
+        self.peak_equity = initial_capital
+        self.max_drawdown = 0.0
+
+        self.windows = dict(self.DEFAULT_WINDOWS if windows is None else windows)
+
+        # مجاميع بادئة: أي نافذة تُحسب بطرح قيمتين دون إعادة مسح السجل
+        self.exit_times = []
+        self.equity_history = []  # رأس المال بعد كل صفقة لانخفاض النوافذ
+        self._prefix = {key: [0.0] for key in (
+            'wins', 'pnl', 'pnl_sq', 'ret', 'ret_sq', 'downside_sq',
+            'r_multiple', 'duration', 'duration_sq'
+        )}
+        self._duration_prefix = [[0] for _ in range(len(self.DURATION_BUCKETS) + 1)]
+
+        self.by_pair = {}
+        self.by_quality = {}
+        self.by_kill_zone = {}
+        self.by_score_bucket = {}
+
+        # منحنى رأس المال والانخفاض مخفّض مسبقاً للتقارير البيانية
+        self.equity_curve = _DecimatedSeries()
+
+    @staticmethod
+    def score_bucket(score):
+        """فئة النقاط: 6-7، 8-9، 10+ ..."""
+        if score is None:
+            return 'N/A'
+        if score >= 10:
+            return '10+'
+        low = int(score) // 2 * 2
+        return f"{low}-{low + 1}"
+
+    def _bucket_index(self, duration_minutes):
+        for i, upper in enumerate(self.DURATION_BUCKETS):
+            if duration_minutes < upper:
+                return i
+        return len(self.DURATION_BUCKETS)
+
+    def update(self, trade):
+        """إضافة صفقة مغلقة: تكلفة ثابتة تقريباً لكل تحديث"""
+        pnl = trade['pnl']
+        exit_time = trade['exit_time']
+
+        equity_before = self.equity
+        ret = pnl / equity_before if equity_before else 0.0
+        self.equity += pnl
+
+        # أقصى انخفاض على كامل السجل
+        self.peak_equity = max(self.peak_equity, self.equity)
+        self.max_drawdown = max(self.max_drawdown, self.peak_equity - self.equity)
+        self.equity_curve.append((exit_time, self.equity, self.peak_equity - self.equity))
+
+        # مضاعف R بالنسبة لمسافة وقف الخسارة
+        risk_pips = abs(trade['entry_price'] - trade['sl_price']) / 0.0001
+        r_multiple = trade['pnl_pips'] / risk_pips if risk_pips > 0 else 0.0
+
+        duration = (exit_time - trade['timestamp']).total_seconds() / 60
+
+        values = {
+            'wins': 1 if pnl > 0 else 0,
+            'pnl': pnl,
+            'pnl_sq': pnl * pnl,
+            'ret': ret,
+            'ret_sq': ret * ret,
+            'downside_sq': ret * ret if ret < 0 else 0.0,
+            'r_multiple': r_multiple,
+            'duration': duration,
+            'duration_sq': duration * duration
+        }
+        for key, value in values.items():
+            series = self._prefix[key]
+            series.append(series[-1] + value)
+
+        bucket = self._bucket_index(duration)
+        for i, series in enumerate(self._duration_prefix):
+            series.append(series[-1] + (1 if i == bucket else 0))
+
+        self.exit_times.append(exit_time)
+        self.equity_history.append(self.equity)
+
+        # التوزيعات حسب الزوج والجودة والـ Kill Zone وفئة النقاط
+        for breakdown, key in (
+            (self.by_pair, trade.get('pair')),
+            (self.by_quality, trade.get('quality')),
+            (self.by_kill_zone, trade.get('kill_zone') or 'OUTSIDE'),
+            (self.by_score_bucket, self.score_bucket(trade.get('score')))
+        ):
+            if key not in breakdown:
+                breakdown[key] = _RunningStats()
+            breakdown[key].update(pnl)
+
+    def _range_for_window(self, name, now=None):
+        """تحويل اسم نافذة إلى نطاق فهارس [start, end)"""
+        total = len(self.exit_times)
+        if name == 'ALL':
+            return 0, total
+
+        window = self.windows[name]
+        if isinstance(window, timedelta):
+            reference = now or (self.exit_times[-1] if self.exit_times else None)
+            if reference is None:
+                return 0, 0
+            return bisect_left(self.exit_times, reference - window), total
+        return max(0, total - window), total
+
+    def _stats_for_range(self, start, end):
+        """حساب المقاييس من فرق المجاميع البادئة"""
+        count = end - start
+        if count <= 0:
+            return {}
+
+        def total(key):
+            series = self._prefix[key]
+            return series[end] - series[start]
+
+        mean_pnl = total('pnl') / count
+        mean_ret = total('ret') / count
+        var_ret = max(total('ret_sq') / count - mean_ret ** 2, 0.0)
+        downside_dev = math.sqrt(total('downside_sq') / count)
+        mean_duration = total('duration') / count
+        var_duration = max(total('duration_sq') / count - mean_duration ** 2, 0.0)
+
+        labels = [f"<{upper}m" for upper in self.DURATION_BUCKETS] + [f">={self.DURATION_BUCKETS[-1]}m"]
+        distribution = {
+            label: series[end] - series[start]
+            for label, series in zip(labels, self._duration_prefix)
+        }
+
+        return {
+            'total_trades': count,
+            'win_rate': total('wins') / count,
+            'total_pnl': total('pnl'),
+            'expectancy': mean_pnl,
+            'expectancy_r': total('r_multiple') / count,
+            'sharpe': mean_ret / math.sqrt(var_ret) if var_ret > 0 else 0.0,
+            'sortino': mean_ret / downside_dev if downside_dev > 0 else 0.0,
+            'avg_duration_minutes': mean_duration,
+            'duration_std_minutes': math.sqrt(var_duration),
+            'duration_distribution': distribution
+        }
+
+    def _drawdown_for_range(self, start, end):
+        """الانخفاض الحالي والأقصى داخل النطاق، بدءاً من رأس المال قبل أول صفقة فيه"""
+        peak = self.equity_history[start - 1] if start > 0 else self.initial_capital
+        worst = 0.0
+        for equity in self.equity_history[start:end]:
+            peak = max(peak, equity)
+            worst = max(worst, peak - equity)
+        return peak - self.equity_history[end - 1], worst
+
+    def query(self, window='ALL', now=None):
+        """مقاييس نافذة معرّفة مسبقاً دون إعادة مسح السجل"""
+        start, end = self._range_for_window(window, now)
+        metrics = self._stats_for_range(start, end)
+        if not metrics:
+            return {}
+
+        if window == 'ALL':
+            metrics['current_drawdown'] = self.peak_equity - self.equity
+            metrics['max_drawdown'] = self.max_drawdown
+        else:
+            metrics['current_drawdown'], metrics['max_drawdown'] = self._drawdown_for_range(start, end)
+        metrics['window'] = window
+        return metrics
+
+    def query_range(self, start_time=None, end_time=None):
+        """مقاييس أي نطاق زمني عبر بحث ثنائي على أوقات الخروج"""
+        start = bisect_left(self.exit_times, start_time) if start_time else 0
+        end = bisect_right(self.exit_times, end_time) if end_time else len(self.exit_times)
+        return self._stats_for_range(start, end)
+
+    def breakdowns(self):
+        """التوزيعات حسب الزوج والجودة والـ Kill Zone وفئة النقاط"""
+        return {
+            name: {key: stats.to_dict() for key, stats in breakdown.items()}
+            for name, breakdown in (
+                ('pair', self.by_pair),
+                ('quality', self.by_quality),
+                ('kill_zone', self.by_kill_zone),
+                ('score_bucket', self.by_score_bucket)
+            )
+        }
\ No newline at end of file
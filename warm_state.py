@@ -0,0 +1,97 @@
+import os
+import pickle
+import time
+from datetime import datetime
+
+
+class WarmStateCache:
+    """حفظ واستعادة الحالة الدافئة لإعادة تشغيل سريعة"""
+
+    def __init__(self, config, path=None):
+        self.config = config
+        self.path = path or config.WARM_STATE_PATH
+
+    def save(self, strategy):
+        """حفظ آخر الشموع والتقويم وسجل الصفقات"""
+        state = {
+            'saved_at': time.time(),
+            'date': datetime.now().date(),
+            'data_cache': strategy.data_aggregator.data_cache,
+            'cache_times': strategy.data_aggregator.cache_times,
+            # آخر تحميل ناجح لكل سلسلة شموع، احتياطي طبقة الجلب عند تعطل المصدر
+            'fetch_cache': {key: entry for key, entry in strategy.fetcher.last_good.items() if key.startswith('yf:')},
+            'news_cache': strategy.kill_zone_manager.news_cache,
+            'last_news_check': strategy.kill_zone_manager.last_news_check,
+            'trades': strategy.performance_tracker.trades,
+            'active_trades': strategy.execution_handler.active_trades,
+            'order_counter': strategy.execution_handler.order_counter,
+            'positions': strategy.position_manager.snapshot() if strategy.position_manager else None,
+            'score_distribution': strategy.analyzer.score_distribution,
+            'capital': strategy.risk_manager.capital,
+            'daily_trades': strategy.risk_manager.daily_trades
+        }
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # كتابة ذرية حتى لا يُترك ملف تالف عند الانقطاع
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """قراءة الحالة المحفوظة إن وجدت"""
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable warm state: {e}")
+            return None
+
+    def restore(self, strategy):
+        """استعادة الحالة الدافئة إلى الاستراتيجية"""
+        state = self.load()
+        if not state:
+            return False
+
+        now = time.time()
+
+        # آخر بيانات جيدة بنفس حد العمر الذي تقبله طبقة الجلب عند الفشل
+        for key, (fetched_at, data) in state.get('fetch_cache', {}).items():
+            if now - fetched_at < self.config.FETCH_MAX_STALE_SECONDS and not strategy.fetcher.has(key):
+                strategy.fetcher.prime(key, data, fetched_at)
+
+        # الشموع المخزنة بنفس صلاحية DATA_CACHE_TTL في المجمع، فالأقدم سيُعاد تحميله على أي حال
+        for cache_key, cached_at in state['cache_times'].items():
+            if now - cached_at < self.config.DATA_CACHE_TTL and cache_key in state['data_cache']:
+                strategy.data_aggregator.data_cache[cache_key] = state['data_cache'][cache_key]
+                strategy.data_aggregator.cache_times[cache_key] = cached_at
+
+        strategy.kill_zone_manager.news_cache.update(state['news_cache'])
+        strategy.kill_zone_manager.last_news_check = state['last_news_check']
+
+        # الصفقات المفتوحة تُستعاد مع مراقبتها، وإلا تبقى بلا نتيجة للأبد
+        active_trades = state.get('active_trades', [])
+        active_ids = {trade['order_id'] for trade in active_trades}
+        trades = [trade for trade in state['trades']
+                  if trade['result'] is not None or trade.get('order_id') in active_ids]
+        if len(trades) < len(state['trades']):
+            print(f"⚠️  Dropped {len(state['trades']) - len(trades)} open trades without execution state")
+
+        strategy.performance_tracker.restore_trades(trades)
+        strategy.execution_handler.restore_active_trades(
+            active_trades, state.get('order_counter', 0), state.get('positions')
+        )
+        strategy.analyzer.score_distribution.update(state.get('score_distribution', {}))
+        strategy.risk_manager.capital = state['capital']
+
+        # عداد الصفقات اليومية لا يُستعاد إلا في نفس اليوم
+        if state['date'] == datetime.now().date():
+            strategy.risk_manager.daily_trades = state['daily_trades']
+
+        return True
\ No newline at end of file